@@ -0,0 +1,259 @@
+# Batch.py
+
+"""
+Batch solving over a worker pool with results in shared memory.
+
+Returning a solved Board (81 Cell objects with candidate sets) or a
+Logger's entries from a pool worker means pickling them back to the
+parent. Here the parent puts all puzzles in one shared memory block and
+the workers write their results into two more, at the puzzle's index:
+
+    puzzles    n * 81 bytes, ASCII digits ('0' or '.' = empty)
+    solutions  n * 81 bytes, ASCII digits ('0' * 81 if not solved)
+    stats      n * STATS.size bytes, one STATS record per puzzle
+
+Workers get (start, end) index ranges and only send back how many
+puzzles they finished, so nothing but small ints goes through the pool's
+pipes. Results sit at their input index, so no reordering is needed.
+"""
+
+import struct
+import time
+from multiprocessing import shared_memory
+
+PUZZLE_BYTES = 81
+
+# Stats record: status, search nodes, solve time in microseconds
+STATS = struct.Struct("<BxxxII")
+
+PENDING = 0
+SOLVED = 1
+NO_SOLUTION = 2
+BAD_PUZZLE = 3
+STATUS_NAMES = {PENDING: "pending", SOLVED: "solved", NO_SOLUTION: "no solution", BAD_PUZZLE: "bad puzzle"}
+
+ENGINES = ("bitboard", "ie")
+UNSOLVED = b"0" * PUZZLE_BYTES
+
+
+# ----------------------------
+# Solvers (run in the workers)
+# ----------------------------
+
+def _solve_bitboard(puzzle):
+    """Returns (status, solution bytes or None, nodes)."""
+    from Bitboard import BitBoard, count_solutions
+
+    board = BitBoard.from_string(puzzle)
+    if board is None:
+        return NO_SOLUTION, None, 0
+    stats = {}
+    count, solution = count_solutions(board, limit=1, stats=stats)
+    if not count:
+        return NO_SOLUTION, None, stats.get("nodes", 0)
+    return SOLVED, bytes(d + 48 for d in solution), stats.get("nodes", 0)
+
+
+def _solve_ie(puzzle):
+    """The full Board / KnowledgeBase / InferenceEngine path, without logging."""
+    from KB import is_solved
+    from UI import build_engine, parse_puzzle
+
+    board, ie = build_engine(parse_puzzle(puzzle.replace(".", "0")))
+    if not ie.solve() or not is_solved(board):
+        return NO_SOLUTION, None, ie.stats["nodes"]
+    solution = "".join(str(v) for row in board.to_grid() for v in row)
+    return SOLVED, solution.encode("ascii"), ie.stats["nodes"]
+
+
+SOLVERS = {"bitboard": _solve_bitboard, "ie": _solve_ie}
+
+
+# Shared memory block names and solver of this worker, set up by _init_worker
+_worker = {}
+
+
+def _init_worker(names, engine):
+    _worker["names"] = names
+    _worker["solve"] = SOLVERS[engine]
+
+
+def _solve_range(job):
+    """
+    Solve puzzles start..end-1 in place. Returns how many were done.
+    The blocks are attached for this job only and closed again, so no
+    worker still holds them when the parent unlinks them.
+    """
+    start, end = job
+    blocks = [shared_memory.SharedMemory(name=name) for name in _worker["names"]]
+    try:
+        puzzles, solutions, stats = (block.buf for block in blocks)
+        solve = _worker["solve"]
+        for k in range(start, end):
+            _solve_into(solve, k, puzzles, solutions, stats)
+    finally:
+        for block in blocks:
+            block.close()
+    return end - start
+
+
+def _solve_into(solve, k, puzzles, solutions, stats):
+    offset = k * PUZZLE_BYTES
+    puzzle = bytes(puzzles[offset:offset + PUZZLE_BYTES]).decode("latin-1")
+    t0 = time.perf_counter()
+    try:
+        status, solution, nodes = solve(puzzle)
+    except ValueError:
+        status, solution, nodes = BAD_PUZZLE, None, 0
+    micros = min(int((time.perf_counter() - t0) * 1e6), 0xFFFFFFFF)
+    solutions[offset:offset + PUZZLE_BYTES] = solution or UNSOLVED
+    STATS.pack_into(stats, k * STATS.size, status, nodes, micros)
+
+
+# ----------------------------
+# Parent side
+# ----------------------------
+
+class SharedBatch:
+    """
+    Puzzles and results of one batch in shared memory.
+    Use as a context manager (or call close()) so the blocks are freed.
+
+        with SharedBatch(puzzles) as batch:
+            for done in batch.run(processes=4):
+                ...
+            batch.solution(0), batch.stats(0)
+    """
+
+    def __init__(self, puzzles):
+        puzzles = list(puzzles)
+        self.count = len(puzzles)
+        size = max(1, self.count * PUZZLE_BYTES)  # zero-sized blocks are not allowed
+        self._blocks = [
+            shared_memory.SharedMemory(create=True, size=size),
+            shared_memory.SharedMemory(create=True, size=size),
+            shared_memory.SharedMemory(create=True, size=max(1, self.count * STATS.size)),
+        ]
+        self.puzzles, self.solutions, self.stats_buf = (block.buf for block in self._blocks)
+        for k, puzzle in enumerate(puzzles):
+            data = puzzle.encode("latin-1", errors="replace")
+            if len(data) != PUZZLE_BYTES:
+                data = b"?" * PUZZLE_BYTES  # rejected by the parser in the worker
+            self.puzzles[k * PUZZLE_BYTES:(k + 1) * PUZZLE_BYTES] = data
+        self.stats_buf[:self.count * STATS.size] = bytes(self.count * STATS.size)
+
+    def run(self, processes=1, engine="bitboard", chunk_size=None):
+        """
+        Solve every puzzle. Yields the number of puzzles finished so far,
+        counting only the front of the batch that is complete, so every
+        index below the yielded number can be read.
+        """
+        if engine not in SOLVERS:
+            raise ValueError(f"Unknown engine {engine!r}, use one of {ENGINES}")
+        if chunk_size is None:
+            chunk_size = max(1, min(64, self.count // (max(1, processes) * 4)))
+        jobs = [(start, min(start + chunk_size, self.count)) for start in range(0, self.count, chunk_size)]
+
+        if processes <= 1:
+            solve = SOLVERS[engine]
+            for start, end in jobs:
+                for k in range(start, end):
+                    _solve_into(solve, k, self.puzzles, self.solutions, self.stats_buf)
+                yield end
+            return
+
+        from multiprocessing import Pool
+
+        names = [block.name for block in self._blocks]
+        done = 0
+        with Pool(processes, initializer=_init_worker, initargs=(names, engine)) as pool:
+            # imap hands the counts back in job order
+            for finished in pool.imap(_solve_range, jobs):
+                done += finished
+                yield done
+
+    def solution(self, k):
+        """Solution string of puzzle k, or None if it was not solved."""
+        offset = k * PUZZLE_BYTES
+        data = bytes(self.solutions[offset:offset + PUZZLE_BYTES])
+        return None if data == UNSOLVED else data.decode("ascii")
+
+    def stats(self, k):
+        status, nodes, micros = STATS.unpack_from(self.stats_buf, k * STATS.size)
+        return {"status": STATUS_NAMES[status], "nodes": nodes, "micros": micros}
+
+    def close(self):
+        self.puzzles = self.solutions = self.stats_buf = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def solve_batch(puzzles, processes=1, engine="bitboard"):
+    """Yield (solution or None, stats dict) for every puzzle, in input order."""
+    with SharedBatch(puzzles) as batch:
+        k = 0
+        for done in batch.run(processes, engine):
+            while k < done:
+                yield batch.solution(k), batch.stats(k)
+                k += 1
+
+
+# ----------------------------
+# Benchmark: shared memory against returning solved Boards through the pool
+# ----------------------------
+
+def _pickled_job(puzzle):
+    from UI import build_engine, parse_puzzle
+
+    board, ie = build_engine(parse_puzzle(puzzle))
+    ie.solve()
+    return board, ie.stats
+
+
+if __name__ == "__main__":
+    # python Batch.py [count] [--processes N] [--engine bitboard|ie]
+    import argparse
+    from multiprocessing import Pool
+
+    from Generator import generate_many
+
+    parser = argparse.ArgumentParser(description="Solve generated puzzles through shared memory.")
+    parser.add_argument("count", type=int, nargs="?", default=200)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--engine", choices=ENGINES, default="ie")
+    args = parser.parse_args()
+
+    puzzles = [p for _, p in generate_many(args.count, seed=1214, processes=args.processes)]
+
+    start = time.perf_counter()
+    results = list(solve_batch(puzzles, args.processes, args.engine))
+    shared = time.perf_counter() - start
+    solved = sum(1 for solution, _ in results if solution is not None)
+    nodes = sum(stats["nodes"] for _, stats in results)
+    print(f"shared memory ({args.engine}): {len(puzzles)} puzzles, {solved} solved, "
+          f"{nodes} nodes, {shared:.2f}s ({len(puzzles) / shared:.0f}/s)")
+
+    if args.engine == "ie":
+        start = time.perf_counter()
+        with Pool(args.processes) as pool:
+            boards = list(pool.imap(_pickled_job, puzzles, chunksize=max(1, args.count // (args.processes * 4))))
+        pickled = time.perf_counter() - start
+        same = all(
+            "".join(str(v) for row in board.to_grid() for v in row) == solution
+            for (board, _), (solution, _) in zip(boards, results)
+        )
+        print(f"Board objects through the pool: {pickled:.2f}s ({len(puzzles) / pickled:.0f}/s), "
+              f"same solutions: {same}")
+
+        import pickle
+
+        print(f"bytes per puzzle: {len(pickle.dumps(boards[0]))} pickled Board+stats "
+              f"against {PUZZLE_BYTES + STATS.size} in shared memory")
@@ -0,0 +1,640 @@
+# Bitboard.py
+
+"""
+Compact bitmask board used by the fast paths (grading, bulk work).
+
+The verbose Board / KnowledgeBase / InferenceEngine path keeps a Cell
+object with a Python set of candidates for every square and logs every
+step. Here the whole board is two flat lists of 81 ints:
+
+    values[i]  0 for empty, 1-9 for a placed digit
+    cands[i]   9-bit mask of remaining candidates (bit d-1 = digit d),
+               always 0 for a filled cell
+
+Cells are numbered i = row * 9 + col.
+
+Every change made through place/eliminate/clear is recorded on a trail,
+so search can undo back to a mark instead of copying the board.
+"""
+
+from itertools import combinations
+
+SIZE = 9
+CELLS = SIZE * SIZE
+ALL = 0x1FF  # all nine candidate bits set
+
+# ----------------------------
+# Precomputed tables
+# ----------------------------
+
+ROW_OF = tuple(i // SIZE for i in range(CELLS))
+COL_OF = tuple(i % SIZE for i in range(CELLS))
+BOX_OF = tuple((i // 27) * 3 + (i % SIZE) // 3 for i in range(CELLS))
+
+# 27 units: rows 0-8, columns 9-17, boxes 18-26
+UNITS = tuple(
+    [tuple(r * SIZE + c for c in range(SIZE)) for r in range(SIZE)]
+    + [tuple(r * SIZE + c for r in range(SIZE)) for c in range(SIZE)]
+    + [
+        tuple(r * SIZE + c
+              for r in range(br, br + 3)
+              for c in range(bc, bc + 3))
+        for br in range(0, SIZE, 3)
+        for bc in range(0, SIZE, 3)
+    ]
+)
+
+CELL_UNITS = tuple(
+    (ROW_OF[i], SIZE + COL_OF[i], 2 * SIZE + BOX_OF[i]) for i in range(CELLS)
+)
+
+PEERS = tuple(
+    tuple(sorted((set(UNITS[CELL_UNITS[i][0]])
+                  | set(UNITS[CELL_UNITS[i][1]])
+                  | set(UNITS[CELL_UNITS[i][2]]))
+                 - {i}))
+    for i in range(CELLS)
+)
+
+BIT = (0,) + tuple(1 << (d - 1) for d in range(1, 10))  # BIT[0] == 0 for empty cells
+POPCOUNT = tuple(bin(m).count("1") for m in range(ALL + 1))
+DIGITS_OF = tuple(
+    tuple(d for d in range(1, 10) if m & BIT[d]) for m in range(ALL + 1)
+)
+DIGIT_OF = {BIT[d]: d for d in range(1, 10)}
+
+# For the per-digit position masks (see BitBoard.rows_pos / cols_pos)
+ROW_BIT = tuple(1 << ROW_OF[i] for i in range(CELLS))
+COL_BIT = tuple(1 << COL_OF[i] for i in range(CELLS))
+OFFSETS_OF = tuple(tuple((d - 1) * SIZE for d in DIGITS_OF[m]) for m in range(ALL + 1))
+
+# A digit's positions inside a box as a 9-bit mask (bit 3 * row + col):
+# the one row / column of the box they all lie in, or -1
+BOX_ROW_OF = tuple(
+    next((r for r in range(3) if m and not m & ~(7 << 3 * r)), -1) for m in range(ALL + 1)
+)
+BOX_COL_OF = tuple(
+    next((c for c in range(3) if m and not m & ~(0o111 << c)), -1) for m in range(ALL + 1)
+)
+
+
+def parse(puzzle):
+    """
+    Convert an 81-character puzzle string into a list of 81 ints.
+    '0' or '.' = empty.
+    """
+    if len(puzzle) != CELLS:
+        raise ValueError("Puzzle string must be 81 characters long (0 or . = empty).")
+    values = []
+    for ch in puzzle:
+        if ch == ".":
+            values.append(0)
+        elif "0" <= ch <= "9":
+            values.append(ord(ch) - 48)
+        else:
+            raise ValueError(f"Invalid character {ch!r} in puzzle string.")
+    return values
+
+
+class BitBoard:
+    def __init__(self):
+        self.values = [0] * CELLS
+        self.cands = [ALL] * CELLS
+        self.trail = []  # packed old states, see mark()/undo()
+        # Per-digit position masks, kept up to date with cands:
+        # rows_pos[k * 9 + r] has bit c set if digit k+1 is a candidate of (r, c),
+        # cols_pos[k * 9 + c] has bit r set for the same cell.
+        self.rows_pos = [ALL] * CELLS
+        self.cols_pos = [ALL] * CELLS
+        # Empty cells left with one candidate (or none) by the last changes,
+        # for naked_singles. May hold stale entries, they are checked again.
+        self.queue = []
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Build a board from 81 ints (0 = empty).
+        Returns None if the givens contradict each other (or leave a cell
+        without candidates).
+        """
+        board = cls()
+        placed = [0] * (3 * SIZE)  # digit masks per unit
+        for i, d in enumerate(values):
+            if d:
+                bit = BIT[d]
+                units = CELL_UNITS[i]
+                if (placed[units[0]] | placed[units[1]] | placed[units[2]]) & bit:
+                    return None
+                for u in units:
+                    placed[u] |= bit
+
+        board.values = list(values)
+        cands = board.cands
+        rows = board.rows_pos = [0] * CELLS
+        cols = board.cols_pos = [0] * CELLS
+        for i, d in enumerate(values):
+            if d:
+                cands[i] = 0
+                continue
+            units = CELL_UNITS[i]
+            m = ALL & ~(placed[units[0]] | placed[units[1]] | placed[units[2]])
+            cands[i] = m
+            if POPCOUNT[m] <= 1:
+                if not m:
+                    return None
+                board.queue.append(i)
+            r = ROW_OF[i]
+            c = COL_OF[i]
+            for off in OFFSETS_OF[m]:
+                rows[off + r] |= COL_BIT[i]
+                cols[off + c] |= ROW_BIT[i]
+        return board
+
+    @classmethod
+    def from_string(cls, puzzle):
+        return cls.from_values(parse(puzzle))
+
+    @classmethod
+    def from_board(cls, board):
+        """Build from a (verbose) Board instance."""
+        return cls.from_values([v or 0 for row in board.to_grid() for v in row])
+
+    def copy(self):
+        other = BitBoard.__new__(BitBoard)
+        other.values = self.values[:]
+        other.cands = self.cands[:]
+        other.rows_pos = self.rows_pos[:]
+        other.cols_pos = self.cols_pos[:]
+        other.queue = self.queue[:]
+        other.trail = []
+        return other
+
+    def to_string(self):
+        return "".join(map(str, self.values))
+
+    def to_grid(self):
+        v = self.values
+        return [v[r * SIZE:(r + 1) * SIZE] for r in range(SIZE)]
+
+    def is_complete(self):
+        return 0 not in self.values
+
+    # -------------------------------------------------
+    # Mutation
+    # -------------------------------------------------
+
+    # Trail entries pack the old state of one cell into an int:
+    # (cell << 13) | (value << 9) | cands
+
+    def mark(self):
+        """Current trail position, to pass to undo() later."""
+        return len(self.trail)
+
+    def undo(self, mark):
+        """Roll every change made since mark() back."""
+        trail = self.trail
+        values = self.values
+        cands = self.cands
+        rows = self.rows_pos
+        cols = self.cols_pos
+        queue = self.queue
+        while len(trail) > mark:
+            e = trail.pop()
+            i = e >> 13
+            old = e & ALL
+            changed = old ^ cands[i]
+            if changed:
+                r = ROW_OF[i]
+                c = COL_OF[i]
+                cb = COL_BIT[i]
+                rb = ROW_BIT[i]
+                for off in OFFSETS_OF[changed]:
+                    rows[off + r] ^= cb
+                    cols[off + c] ^= rb
+            value = (e >> 9) & 15
+            values[i] = value
+            cands[i] = old
+            if not value and POPCOUNT[old] <= 1:
+                queue.append(i)  # a pending single again
+
+    def _flip(self, i, changed):
+        """Flip cell i in the position masks of the digits in changed."""
+        rows = self.rows_pos
+        cols = self.cols_pos
+        r = ROW_OF[i]
+        c = COL_OF[i]
+        cb = COL_BIT[i]
+        rb = ROW_BIT[i]
+        for off in OFFSETS_OF[changed]:
+            rows[off + r] ^= cb
+            cols[off + c] ^= rb
+
+    def place(self, i, d):
+        """
+        Put digit d in cell i and remove it from every peer.
+        Returns False if d was not a candidate or a peer ran out of candidates.
+        """
+        bit = BIT[d]
+        cands = self.cands
+        m = cands[i]
+        if not m & bit:
+            return False
+        trail = self.trail
+        trail.append((i << 13) | m)
+        self.values[i] = d
+        cands[i] = 0
+        rows = self.rows_pos
+        cols = self.cols_pos
+        r = ROW_OF[i]
+        c = COL_OF[i]
+        for off in OFFSETS_OF[m]:
+            rows[off + r] ^= COL_BIT[i]
+            cols[off + c] ^= ROW_BIT[i]
+
+        off = (d - 1) * SIZE
+        queue = self.queue
+        for p in PEERS[i]:
+            m = cands[p]
+            if m & bit:
+                trail.append((p << 13) | m)
+                m ^= bit
+                cands[p] = m
+                rows[off + ROW_OF[p]] ^= COL_BIT[p]
+                cols[off + COL_OF[p]] ^= ROW_BIT[p]
+                if POPCOUNT[m] <= 1:
+                    queue.append(p)
+                    if not m:
+                        return False
+        return True
+
+    def eliminate(self, i, mask):
+        """
+        Remove the digits in mask from cell i.
+        Returns the number of digits removed, or -1 if the cell ran out of candidates.
+        """
+        m = self.cands[i]
+        hit = m & mask
+        if not hit:
+            return 0
+        self.trail.append((i << 13) | m)
+        m ^= hit
+        self.cands[i] = m
+        self._flip(i, hit)
+        if POPCOUNT[m] <= 1:
+            self.queue.append(i)
+            if not m:
+                return -1
+        return POPCOUNT[hit]
+
+    def clear(self, i):
+        """
+        Empty cell i. Its candidates are recomputed from its peers, and its
+        digit is given back only to the peers that have no other copy of it
+        in sight, so eliminations elsewhere are kept.
+        """
+        values = self.values
+        cands = self.cands
+        trail = self.trail
+        d = values[i]
+        if not d:
+            return
+        bit = BIT[d]
+        trail.append((i << 13) | (d << 9))
+        values[i] = 0
+
+        m = ALL
+        for q in PEERS[i]:
+            m &= ~BIT[values[q]]
+        cands[i] = m
+        self._flip(i, m)
+        if POPCOUNT[m] <= 1:
+            self.queue.append(i)
+
+        for p in PEERS[i]:
+            if values[p]:
+                continue
+            for q in PEERS[p]:
+                if values[q] == d:
+                    break
+            else:
+                if not cands[p] & bit:
+                    trail.append((p << 13) | cands[p])
+                    cands[p] |= bit
+                    self._flip(p, bit)
+
+
+# ----------------------------
+# Techniques
+# ----------------------------
+# Each technique makes one pass over the board and returns the number of
+# placements/eliminations it made, or -1 on a contradiction. They mirror
+# the rules in KB.py and are listed cheapest first in TECHNIQUES.
+
+def naked_singles(board):
+    """Place every empty cell that has exactly one candidate (driven by board.queue)."""
+    count = 0
+    values = board.values
+    cands = board.cands
+    queue = board.queue
+    while queue:
+        i = queue.pop()
+        if values[i]:
+            continue
+        m = cands[i]
+        if POPCOUNT[m] == 1:
+            if not board.place(i, DIGIT_OF[m]):
+                return -1
+            count += 1
+        elif not m:
+            return -1
+    return count
+
+
+def hidden_singles(board):
+    """Place digits that only have one possible cell left in a unit."""
+    count = 0
+    values = board.values
+    cands = board.cands
+    bits = BIT
+    for unit in UNITS:
+        once = twice = filled = 0
+        for i in unit:
+            v = values[i]
+            if v:
+                filled |= bits[v]
+            else:
+                m = cands[i]
+                twice |= once & m
+                once |= m
+        if filled == ALL:
+            continue
+        if (once | filled) != ALL:
+            return -1  # some digit has nowhere to go
+        singles = once & ~twice & ~filled
+        while singles:
+            bit = singles & -singles
+            singles ^= bit
+            for i in unit:
+                if cands[i] & bit:
+                    if not board.place(i, DIGIT_OF[bit]):
+                        return -1
+                    count += 1
+                    break
+            else:
+                return -1  # the cell was taken by another single in this unit
+    return count
+
+
+def naked_pairs(board):
+    """Two cells of a unit with the same two candidates claim those digits."""
+    count = 0
+    cands = board.cands
+    for unit in UNITS:
+        pairs = {}
+        for i in unit:
+            m = cands[i]
+            if POPCOUNT[m] == 2:
+                pairs.setdefault(m, []).append(i)
+        for m, cells in pairs.items():
+            if len(cells) > 2:
+                return -1
+            if len(cells) < 2:
+                continue
+            for i in unit:
+                if cands[i] & m and i not in cells:
+                    n = board.eliminate(i, m)
+                    if n < 0:
+                        return -1
+                    count += n
+    return count
+
+
+def naked_triples(board):
+    """Three cells of a unit whose candidates together are three digits claim them."""
+    count = 0
+    cands = board.cands
+    for unit in UNITS:
+        small = [i for i in unit if 2 <= POPCOUNT[cands[i]] <= 3]
+        if len(small) < 3:
+            continue
+        for a, b, c in combinations(small, 3):
+            union = cands[a] | cands[b] | cands[c]
+            if POPCOUNT[union] != 3:
+                continue
+            for i in unit:
+                if cands[i] & union and i != a and i != b and i != c:
+                    n = board.eliminate(i, union)
+                    if n < 0:
+                        return -1
+                    count += n
+    return count
+
+
+def pointing_pairs(board):
+    """A digit locked to one row/column inside a box leaves the rest of that line."""
+    count = 0
+    rows_pos = board.rows_pos
+    cols_pos = board.cols_pos
+    for k in range(SIZE):
+        bit = 1 << k
+        off = k * SIZE
+        for br in range(0, SIZE, 3):
+            row = off + br
+            if not (rows_pos[row] or rows_pos[row + 1] or rows_pos[row + 2]):
+                continue
+            for bc in range(0, SIZE, 3):
+                m = (rows_pos[row] >> bc & 7
+                     | (rows_pos[row + 1] >> bc & 7) << 3
+                     | (rows_pos[row + 2] >> bc & 7) << 6)
+                if not m:
+                    continue
+
+                r = BOX_ROW_OF[m]
+                if r >= 0:
+                    r += br
+                    for c1 in DIGITS_OF[rows_pos[off + r] & ~(7 << bc)]:
+                        n = board.eliminate(r * SIZE + c1 - 1, bit)
+                        if n < 0:
+                            return -1
+                        count += n
+
+                c = BOX_COL_OF[m]
+                if c >= 0:
+                    c += bc
+                    for r1 in DIGITS_OF[cols_pos[off + c] & ~(7 << br)]:
+                        n = board.eliminate((r1 - 1) * SIZE + c, bit)
+                        if n < 0:
+                            return -1
+                        count += n
+    return count
+
+
+def box_line_reduction(board):
+    """A digit locked to one box inside a row/column leaves the rest of that box."""
+    count = 0
+    rows_pos = board.rows_pos
+    cols_pos = board.cols_pos
+    for k in range(SIZE):
+        bit = 1 << k
+        off = k * SIZE
+        for lines, by_rows in ((rows_pos[off:off + SIZE], True), (cols_pos[off:off + SIZE], False)):
+            for line in range(SIZE):
+                mask = lines[line]
+                if not mask:
+                    continue
+                start = (line // 3) * 3
+                for b in range(0, SIZE, 3):
+                    band = 7 << b
+                    if mask & ~band:
+                        continue
+                    for other in range(start, start + 3):
+                        if other == line:
+                            continue
+                        for j1 in DIGITS_OF[lines[other] & band]:
+                            i = other * SIZE + j1 - 1 if by_rows else (j1 - 1) * SIZE + other
+                            n = board.eliminate(i, bit)
+                            if n < 0:
+                                return -1
+                            count += n
+    return count
+
+
+def _fish(board, size):
+    """
+    A digit whose places in `size` rows fall into `size` columns leaves those
+    columns in every other row (and with rows and columns swapped).
+    """
+    count = 0
+    rows_pos = board.rows_pos
+    cols_pos = board.cols_pos
+    for k in range(SIZE):
+        bit = 1 << k
+        off = k * SIZE
+        rows = rows_pos[off:off + SIZE]
+        cols = cols_pos[off:off + SIZE]
+        for lines, cross, by_rows in ((rows, cols, True), (cols, rows, False)):
+            base = [j for j in range(SIZE) if 2 <= POPCOUNT[lines[j]] <= size]
+            for combo in combinations(base, size):
+                union = 0
+                covered = 0
+                for j in combo:
+                    union |= lines[j]
+                    covered |= 1 << j
+                if POPCOUNT[union] != size:
+                    continue
+                for x1 in DIGITS_OF[union]:
+                    x = x1 - 1
+                    for y1 in DIGITS_OF[cross[x] & ~covered]:
+                        i = (y1 - 1) * SIZE + x if by_rows else x * SIZE + y1 - 1
+                        n = board.eliminate(i, bit)
+                        if n < 0:
+                            return -1
+                        count += n
+    return count
+
+
+def x_wing(board):
+    return _fish(board, 2)
+
+
+def swordfish(board):
+    return _fish(board, 3)
+
+
+# Same order and names as the rules registered on KnowledgeBase in UI.py
+TECHNIQUES = (
+    ("single_candidate", naked_singles),
+    ("hidden_single", hidden_singles),
+    ("pointing_pairs", pointing_pairs),
+    ("box_line_reduction", box_line_reduction),
+    ("naked_pairs", naked_pairs),
+    ("naked_triples", naked_triples),
+    ("x_wing", x_wing),
+    ("swordfish", swordfish),
+)
+
+# Cheap propagation used at every search node
+SEARCH_TECHNIQUES = TECHNIQUES[:2]
+
+
+def propagate(board, techniques=SEARCH_TECHNIQUES):
+    """
+    Apply techniques cheapest first, restarting from the cheapest one
+    after any progress. Returns False on a contradiction.
+    """
+    k = 0
+    while k < len(techniques):
+        found = techniques[k][1](board)
+        if found < 0:
+            return False
+        k = 0 if found else k + 1
+    return True
+
+
+# ----------------------------
+# Search
+# ----------------------------
+
+def _pick_cell(board):
+    """Empty cell with the fewest candidates (None if the board is full)."""
+    values = board.values
+    cands = board.cands
+    best = None
+    best_count = 10
+    for i in range(CELLS):
+        if not values[i]:
+            n = POPCOUNT[cands[i]]
+            if n < best_count:
+                best, best_count = i, n
+                if n <= 2:
+                    break
+    return best
+
+
+def count_solutions(board, limit=2, stats=None, rng=None, techniques=SEARCH_TECHNIQUES):
+    """
+    Depth-first search in place, undoing each branch through the trail.
+    The board is left exactly as it was passed in.
+    Returns (number of solutions found, capped at limit; first solution as a list of 81 ints).
+    stats: optional dict, "nodes" is incremented for every search node.
+    rng: optional random.Random used to shuffle the digit order.
+    """
+    solutions = []
+    mark = board.mark()
+    _search(board, limit, solutions, stats, rng, techniques)
+    board.undo(mark)
+    return len(solutions), (solutions[0] if solutions else None)
+
+
+def _search(board, limit, solutions, stats, rng, techniques):
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
+
+    if not propagate(board, techniques):
+        return
+    i = _pick_cell(board)
+    if i is None:
+        solutions.append(board.values[:])
+        return
+
+    digits = list(DIGITS_OF[board.cands[i]])
+    if rng is not None:
+        rng.shuffle(digits)
+    for d in digits:
+        mark = board.mark()
+        if board.place(i, d):
+            _search(board, limit, solutions, stats, rng, techniques)
+        board.undo(mark)
+        if len(solutions) >= limit:
+            return
+
+
+def solve(puzzle):
+    """Solve an 81-character puzzle string. Returns the solution string or None."""
+    board = BitBoard.from_string(puzzle)
+    if board is None:
+        return None
+    count, solution = count_solutions(board, limit=1)
+    if not count:
+        return None
+    return "".join(map(str, solution))
@@ -1,4 +1,14 @@
 from Cell import Cell
+import random
+
+# Zobrist keys: one random 64-bit number per (row, col, value).
+# The hash of a board is the XOR of the keys of all placed values, so
+# placing or clearing a value updates it with one XOR each.
+_zobrist_rng = random.Random(1214)
+ZOBRIST = [
+    [[0] + [_zobrist_rng.getrandbits(64) for _ in range(9)] for _ in range(9)]
+    for _ in range(9)
+]
 
 class Board:
     def __init__(self, initial_grid):
@@ -8,6 +18,7 @@ class Board:
         self.size = len(initial_grid)
         self.cells = []          # 2D list of Cell objects
         self.givens = set()      # coordinates (row, col) that were given from the start
+        self.zobrist = 0         # hash of the placed values, kept up to date by set_value
 
         for r in range(self.size):
             row = []
@@ -18,6 +29,7 @@ class Board:
                 else:
                     cell = Cell(r, c, value)
                     self.givens.add((r, c))
+                    self.zobrist ^= ZOBRIST[r][c][value]
                 row.append(cell)
             self.cells.append(row)
 
@@ -25,7 +37,10 @@ class Board:
         return self.cells[row][col].value
 
     def set_value(self, row, col, value):
-        self.cells[row][col].value = value
+        cell = self.cells[row][col]
+        keys = ZOBRIST[row][col]
+        self.zobrist ^= keys[cell.value or 0] ^ keys[value or 0]
+        cell.value = value
 
     def is_given(self, row, col):
         """Return True if this cell was part of the original puzzle."""
@@ -0,0 +1,210 @@
+# CSP.py
+
+"""
+Arc consistency (AC-3) and forward checking on a Board.
+
+Every cell is a CSP variable. Its domain is {value} for a filled cell and
+cell.candidates for an empty one. Every pair of peers (same row, column or
+box) is a "!=" constraint, so revising the arc (Xi, Xj) can only remove a
+value from Xi when the domain of Xj is exactly that one value.
+
+An empty domain (a "wipeout") means the board cannot be completed, and is
+reported straight away instead of after the fact by is_board_valid.
+
+With an Explanations object, every removal also records which search
+guesses (by depth) it depends on, so a wipeout can be traced back to the
+guesses that caused it (used for conflict-directed backjumping in IE.py).
+"""
+
+from collections import deque
+
+from Bitboard import PEERS
+
+SIZE = 9
+
+# Peer graph as (row, col) pairs, shared with the Bitboard core
+PEER_CELLS = {
+    (i // SIZE, i % SIZE): tuple((p // SIZE, p % SIZE) for p in PEERS[i])
+    for i in range(SIZE * SIZE)
+}
+
+
+NO_REASON = frozenset()
+
+
+class Explanations:
+    """
+    Why values left the domains, as frozensets of guess depths.
+
+    removed[((row, col), v)]  guesses that removed v from (row, col)
+    assigned[(row, col)]      guesses that put the current value there
+    conflict                  guesses behind the last wipeout found
+
+    Anything not recorded follows from the givens alone (empty reason).
+    """
+
+    def __init__(self):
+        self.removed = {}
+        self.assigned = {}
+        self.conflict = NO_REASON
+
+    def copy(self):
+        other = Explanations()
+        other.removed = dict(self.removed)
+        other.assigned = dict(self.assigned)
+        return other
+
+    def why_single(self, board, cell):
+        """Guesses that forced the domain of cell down to its one value."""
+        if cell in self.assigned:
+            return self.assigned[cell]
+        r, c = cell
+        if board.cells[r][c].value not in (None, 0):
+            return NO_REASON
+        (v,) = domain(board, r, c)
+        return self.why_without(cell, v)
+
+    def why_without(self, cell, keep=None):
+        """Guesses that removed every value except keep from cell."""
+        reason = NO_REASON
+        removed = self.removed
+        for v in range(1, 10):
+            if v != keep:
+                reason = reason | removed.get((cell, v), NO_REASON)
+        return reason
+
+    def why_outside(self, cell, keep):
+        """Guesses that removed every value not in the set keep from cell."""
+        reason = NO_REASON
+        removed = self.removed
+        for v in range(1, 10):
+            if v not in keep:
+                reason = reason | removed.get((cell, v), NO_REASON)
+        return reason
+
+    def why_taken(self, board, cell, v):
+        """
+        Guesses behind a peer of cell that holds v (of those peers, the one
+        that depends on the fewest guesses). NO_REASON if no peer holds v.
+        """
+        best = None
+        for r, c in PEER_CELLS[cell]:
+            if board.cells[r][c].value == v:
+                reason = self.assigned.get((r, c), NO_REASON)
+                if best is None or len(reason) < len(best):
+                    best = reason
+        return NO_REASON if best is None else best
+
+    def why_not(self, board, cell, v):
+        """
+        Guesses that keep v out of cell: the ones behind its value if it is
+        filled, otherwise the ones that removed v from its candidates.
+        """
+        r, c = cell
+        if board.cells[r][c].value not in (None, 0):
+            return self.assigned.get(cell, NO_REASON)
+        return self.removed.get((cell, v), NO_REASON)
+
+
+def domain(board, row, col):
+    """The current domain of (row, col) as a set (do not modify it)."""
+    cell = board.cells[row][col]
+    if cell.value not in (None, 0):
+        return {cell.value}
+    return cell.candidates
+
+
+def revise(board, xi, xj, logger=None, explain=None):
+    """
+    Make the arc (xi, xj) consistent.
+    Returns (removed, wiped): whether a value was removed from xi and
+    whether xi was left without any value.
+    """
+    dj = domain(board, *xj)
+    if len(dj) != 1:
+        return False, False
+    v = next(iter(dj))
+
+    cell = board.cells[xi[0]][xi[1]]
+    if cell.value not in (None, 0):
+        # a filled cell cannot lose its value: two equal peers
+        if cell.value != v:
+            return False, False
+        if explain is not None:
+            explain.conflict = explain.why_single(board, xi) | explain.why_single(board, xj)
+        return False, True
+
+    if v not in cell.candidates:
+        return False, False
+    cell.candidates.discard(v)
+    if explain is not None:
+        explain.removed[(xi, v)] = explain.why_single(board, xj)
+        if not cell.candidates:
+            explain.conflict = explain.why_without(xi)
+    if logger is not None:
+        logger.add_elimination(
+            rule_name="arc_consistency",
+            row=xi[0],
+            col=xi[1],
+            removed={v},
+            reason=f"because {xj} can only be {v}",
+        )
+    return True, not cell.candidates
+
+
+def ac3(board, changed=None, logger=None, explain=None):
+    """
+    Run AC-3 until every arc is consistent.
+
+    changed: cells whose domain just shrank (e.g. a guessed cell); only arcs
+    pointing at them are queued. By default every arc into a cell with a
+    single-value domain is queued, which are the only arcs that can remove
+    anything for "!=" constraints.
+
+    Returns False on a domain wipeout; explain.conflict then holds the
+    guesses responsible.
+    """
+    if changed is None:
+        changed = []
+        for r in range(board.size):
+            for c in range(board.size):
+                size = len(domain(board, r, c))
+                if size == 0:
+                    if explain is not None:
+                        explain.conflict = explain.why_without((r, c))
+                    return False
+                if size == 1:
+                    changed.append((r, c))
+
+    queue = deque((xk, xj) for xj in changed for xk in PEER_CELLS[xj])
+    while queue:
+        xi, xj = queue.popleft()
+        removed, wiped = revise(board, xi, xj, logger, explain)
+        if wiped:
+            return False
+        if removed and len(domain(board, *xi)) == 1:
+            # xi became a singleton, so it now constrains its own peers
+            for xk in PEER_CELLS[xi]:
+                if xk != xj:
+                    queue.append((xk, xi))
+    return True
+
+
+def forward_check(board, row, col, value):
+    """
+    Would putting value at (row, col) leave some peer without any value?
+    Returns True if the assignment survives, without changing the board.
+    """
+    return blocking_peer(board, row, col, value) is None
+
+
+def blocking_peer(board, row, col, value):
+    """The first peer whose domain is exactly {value}, or None."""
+    for r, c in PEER_CELLS[(row, col)]:
+        cell = board.cells[r][c]
+        if cell.value not in (None, 0):
+            if cell.value == value:
+                return (r, c)
+        elif cell.candidates == {value}:
+            return (r, c)
+    return None
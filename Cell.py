@@ -5,7 +5,7 @@ class Cell:
         self.row = row
         self.column = column
         self.value = value
-        self.candidates = set()
+        self.candidates = None  # not computed yet (see KnowledgeBase.initialize_candidates)
         
     def __repr__(self):
             return f"Cell(r={self.row}, c={self.column}, v={self.value}, cand={self.candidates})"
\ No newline at end of file
@@ -0,0 +1,217 @@
+# Generator.py
+
+"""
+Bulk puzzle generator built on the Bitboard core.
+
+1) Fill an empty board with a randomized search to get a full grid.
+2) Remove clues (one symmetry orbit at a time, in random order) and keep
+   a removal only if the solution stays unique. The clue board is edited
+   in place with BitBoard.clear/place and the uniqueness check searches
+   under a trail mark, so nothing is rebuilt or copied per removal.
+3) Optionally keep only puzzles that grade to a target label.
+
+Every puzzle k of a run gets its own random.Random seeded from the
+string "seed:k", so the output is the same for any number of processes
+and two different (seed, k) pairs never share a random stream.
+"""
+
+import random
+import sys
+import time
+
+from Bitboard import (
+    BitBoard,
+    CELLS,
+    COL_OF,
+    ROW_OF,
+    TECHNIQUES,
+    count_solutions,
+    propagate,
+)
+from Grader import LABELS, grade
+
+# ----------------------------
+# Symmetry
+# ----------------------------
+
+SYMMETRIES = {
+    "none": lambda r, c: [(r, c)],
+    "rotational": lambda r, c: [(r, c), (8 - r, 8 - c)],
+    "diagonal": lambda r, c: [(r, c), (c, r)],
+    "mirror": lambda r, c: [(r, c), (r, 8 - c)],
+    "full": lambda r, c: [(r, c), (c, 8 - r), (8 - r, 8 - c), (8 - c, r)],
+}
+
+
+def symmetry_orbits(symmetry):
+    """List of cell-index tuples that must be removed together."""
+    if symmetry not in SYMMETRIES:
+        raise ValueError(f"Unknown symmetry {symmetry!r}, use one of {sorted(SYMMETRIES)}")
+    seen = set()
+    orbits = []
+    for i in range(CELLS):
+        if i in seen:
+            continue
+        orbit = tuple(sorted({r * 9 + c for r, c in SYMMETRIES[symmetry](ROW_OF[i], COL_OF[i])}))
+        seen.update(orbit)
+        orbits.append(orbit)
+    return orbits
+
+
+# ----------------------------
+# Target difficulty
+# ----------------------------
+
+# Hardest technique tier a removal may require for each target label.
+# "Hard" means search is needed, so any unique puzzle is allowed while removing.
+MAX_TIER = dict(LABELS)
+
+
+def random_grid(rng):
+    """A random complete grid as a list of 81 ints."""
+    board = BitBoard()
+    _, solution = count_solutions(board, limit=1, rng=rng)
+    return solution
+
+
+def _still_unique(board, orbit, solution):
+    """
+    board has the orbit cleared. The old puzzle had exactly one solution,
+    so any other solution must differ from it in one of the orbit cells.
+    Look for one with a search per orbit cell, undoing everything after.
+    """
+    mark = board.mark()
+    unique = True
+    for i in orbit:
+        inner = board.mark()
+        if board.eliminate(i, 1 << (solution[i] - 1)) >= 0:
+            count, _ = count_solutions(board, limit=1)
+            if count:
+                unique = False
+        board.undo(inner)
+        if not unique:
+            break
+        # later cells only need to cover solutions that agree here
+        if not board.place(i, solution[i]):
+            break
+    board.undo(mark)
+    return unique
+
+
+def _solved_by_rules(board, max_tier):
+    """True if the rules up to max_tier alone complete the board (so it is unique)."""
+    mark = board.mark()
+    solved = propagate(board, TECHNIQUES[:max_tier + 1]) and board.is_complete()
+    board.undo(mark)
+    return solved
+
+
+def make_puzzle(rng, symmetry="none", target=None):
+    """
+    Generate one puzzle with a unique solution.
+    Returns (puzzle string, grade dict).
+    """
+    solution = random_grid(rng)
+    board = BitBoard.from_values(solution)
+    max_tier = MAX_TIER.get(target)
+
+    orbits = symmetry_orbits(symmetry)
+    rng.shuffle(orbits)
+    for orbit in orbits:
+        mark = board.mark()
+        for i in orbit:
+            board.clear(i)
+        if max_tier is not None:
+            keep = _solved_by_rules(board, max_tier)
+        else:
+            keep = _still_unique(board, orbit, solution)
+        if not keep:
+            board.undo(mark)
+
+    puzzle = board.to_string()
+    return puzzle, grade(puzzle)
+
+
+def generate(seed, index, symmetry="none", target=None, max_attempts=50):
+    """
+    Puzzle number `index` of the run with this seed.
+    Retries (with the same rng) until the grade matches target.
+    Returns (label, puzzle string). If no attempt reaches target within
+    max_attempts, the last puzzle is returned with its own label, so
+    callers can check label != target.
+    """
+    rng = random.Random(f"{seed}:{index}")
+    for _ in range(max_attempts):
+        puzzle, g = make_puzzle(rng, symmetry, target)
+        if target is None or g["label"] == target:
+            break
+    return g["label"], puzzle
+
+
+def _generate_job(job):
+    return generate(*job)
+
+
+def generate_many(count, seed=0, processes=1, symmetry="none", target=None):
+    """
+    Yield (label, puzzle string) for puzzles 0..count-1 in order.
+    processes > 1 spreads the work over a multiprocessing pool.
+    """
+    jobs = ((seed, k, symmetry, target) for k in range(count))
+    if processes <= 1:
+        for job in jobs:
+            yield _generate_job(job)
+        return
+
+    from multiprocessing import Pool
+
+    with Pool(processes) as pool:
+        yield from pool.imap(_generate_job, jobs, chunksize=max(1, min(64, count // (processes * 4))))
+
+
+def write_puzzles(f, puzzles):
+    """Write (label, puzzle) pairs in the testpuzzles.txt format read by UI.py."""
+    for label, puzzle in puzzles:
+        f.write(f"# {label}\n{puzzle}\n\n")
+
+
+# ----------------------------
+# Command line use
+# ----------------------------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate sudoku puzzles.")
+    parser.add_argument("count", type=int, help="number of puzzles")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--symmetry", choices=sorted(SYMMETRIES), default="none")
+    parser.add_argument("--target", choices=[label for label, _ in LABELS] + ["Hard"],
+                        help="keep only puzzles of this grade; a puzzle that still misses it after "
+                             "50 attempts is written with its own label and counted on stderr")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    missed = 0
+
+    def counted(puzzles):
+        global missed
+        for label, puzzle in puzzles:
+            if args.target is not None and label != args.target:
+                missed += 1
+            yield label, puzzle
+
+    start = time.perf_counter()
+    puzzles = counted(generate_many(args.count, args.seed, args.processes, args.symmetry, args.target))
+    if args.output:
+        with open(args.output, "w") as f:
+            write_puzzles(f, puzzles)
+    else:
+        write_puzzles(sys.stdout, puzzles)
+    elapsed = time.perf_counter() - start
+
+    print(f"Generated {args.count} puzzles in {elapsed:.2f}s "
+          f"({args.count / elapsed:.1f} puzzles/s)", file=sys.stderr)
+    if missed:
+        print(f"{missed} puzzles did not reach the target {args.target} and keep their own label",
+              file=sys.stderr)
@@ -0,0 +1,135 @@
+# Grader.py
+
+"""
+Automatic difficulty grading.
+
+Runs the rule set cheapest first on a BitBoard (same techniques and order
+as the KnowledgeBase rules, see Bitboard.TECHNIQUES), records the hardest
+technique that was needed and how many steps each tier made, and falls
+back to search if the rules stall. No Logger trace is built.
+"""
+
+import sys
+
+from Bitboard import BitBoard, TECHNIQUES, count_solutions
+from PuzzleFormatter import read_puzzles
+
+TIER_NAMES = [name for name, _ in TECHNIQUES]
+
+# Score per step for each technique
+TIER_WEIGHTS = {
+    "single_candidate": 1,
+    "hidden_single": 2,
+    "pointing_pairs": 5,
+    "box_line_reduction": 5,
+    "naked_pairs": 10,
+    "naked_triples": 20,
+    "x_wing": 40,
+    "swordfish": 60,
+}
+SEARCH_WEIGHT = 200       # flat cost for needing search at all
+NODE_WEIGHT = 10          # plus this much per search node
+
+# Hardest tier index (into TECHNIQUES) allowed for each label, checked in order
+LABELS = (
+    ("Easy", TIER_NAMES.index("hidden_single")),
+    ("Medium", TIER_NAMES.index("naked_triples")),
+)
+SEARCH_LABEL = "Hard"
+
+
+def grade(puzzle):
+    """
+    Grade an 81-character puzzle string (or a BitBoard, which is modified).
+
+    Returns a dict:
+        label     "Easy" / "Medium" / "Hard", or None if the puzzle is invalid
+        hardest   name of the hardest technique used (None if none was needed)
+        steps     {technique name: placements/eliminations made by it}
+        search    True if the rules stalled and search was needed
+        nodes     search nodes explored (0 without search)
+        solutions 0, 1 or 2 (2 = more than one)
+        score     numeric difficulty
+    """
+    board = BitBoard.from_string(puzzle) if isinstance(puzzle, str) else puzzle
+
+    result = {
+        "label": None,
+        "hardest": None,
+        "steps": {name: 0 for name, _ in TECHNIQUES},
+        "search": False,
+        "nodes": 0,
+        "solutions": 0,
+        "score": 0,
+    }
+    if board is None:
+        return result
+
+    steps = [0] * len(TECHNIQUES)
+    hardest = -1
+    k = 0
+    while k < len(TECHNIQUES):
+        found = TECHNIQUES[k][1](board)
+        if found < 0:
+            _fill(result, steps, hardest)
+            return result
+        if found:
+            steps[k] += found
+            if k > hardest:
+                hardest = k
+            k = 0
+        else:
+            k += 1
+
+    _fill(result, steps, hardest)
+
+    if board.is_complete():
+        result["solutions"] = 1
+    else:
+        stats = {"nodes": 0}
+        count, _ = count_solutions(board, limit=2, stats=stats)
+        result["search"] = True
+        result["nodes"] = stats["nodes"]
+        result["solutions"] = count
+        result["score"] += SEARCH_WEIGHT + NODE_WEIGHT * stats["nodes"]
+
+    if result["solutions"] == 1:
+        result["label"] = label_for(hardest, result["search"])
+    return result
+
+
+def _fill(result, steps, hardest):
+    for (name, _), n in zip(TECHNIQUES, steps):
+        result["steps"][name] = n
+    if hardest >= 0:
+        result["hardest"] = TECHNIQUES[hardest][0]
+    result["score"] = sum(TIER_WEIGHTS[name] * n for name, n in zip(TIER_NAMES, steps))
+
+
+def label_for(hardest, search):
+    """Map the hardest tier index and the search flag to a testpuzzles.txt label."""
+    if search:
+        return SEARCH_LABEL
+    for label, max_tier in LABELS:
+        if hardest <= max_tier:
+            return label
+    return SEARCH_LABEL
+
+
+def grade_many(puzzles):
+    """Grade an iterable of puzzle strings, yielding one result dict per puzzle."""
+    for puzzle in puzzles:
+        yield grade(puzzle)
+
+
+# ----------------------------
+# Command line use
+# ----------------------------
+if __name__ == "__main__":
+    # python Grader.py [puzzles.txt]
+    path = sys.argv[1] if len(sys.argv) > 1 else "testpuzzles.txt"
+    for label, puzzle in read_puzzles(path):
+        g = grade(puzzle)
+        print(f"{puzzle}  file={label}  graded={g['label']}  "
+              f"hardest={g['hardest']}  search={g['search']}  "
+              f"nodes={g['nodes']}  score={g['score']}")
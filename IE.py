@@ -8,18 +8,53 @@ from KB import (
     find_empty_cell,
     get_candidates,
 )
+from CSP import ac3, blocking_peer, Explanations, NO_REASON
+from functools import lru_cache
 import copy
+import inspect
+
+# Nogood store limits (nogoods are sets of guesses that cannot all hold)
+MAX_NOGOOD_SIZE = 6
+MAX_NOGOODS = 10000
+
+
+@lru_cache(maxsize=None)
+def _takes_explain(rule):
+    """True if the rule accepts an explain argument (see the Rules section of KB.py)."""
+    try:
+        params = inspect.signature(rule).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == "explain" or p.kind is p.VAR_KEYWORD for p in params)
+
 
 class InferenceEngine:
-    def __init__(self, board, kb, logger=None):
+    def __init__(self, board, kb, logger=None, tt=None):
         """
         board: Board instance
         kb: KnowledgeBase instance
         logger: Logger instance (or None)
+        tt: TranspositionTable of dead board states, or None for no table.
+            Within one search no two nodes have the same placed values, so
+            a table only pays off when it is shared between searches of
+            related puzzles (e.g. the same puzzle with clues removed).
         """
         self.board = board
         self.kb = kb
         self.logger = logger
+        self.tt = tt
+        self._reset_search()
+
+    def _reset_search(self):
+        """Clear the search statistics, the guess path and the learned nogoods."""
+        self.stats = {"nodes": 0, "backjumps": 0, "nogoods": 0, "nogood_prunes": 0, "tt_hits": 0}
+        self._guesses = []        # guess (row, col, value) made at each depth
+        self._guess_depth = {}    # the same, guess -> depth
+        self._nogoods = {}        # guess -> list of nogoods containing it
+        self._conflict = NO_REASON
+        self._limit = 1           # stop after this many solutions
+        self.solutions = 0
+        self._first_solution = None
 
     # -------------------------------------------------
     # 1) RULE-ONLY INFERENCE (no guessing)
@@ -62,56 +97,182 @@ class InferenceEngine:
         3) Otherwise, start backtracking that also uses rules
            in each branch.
         """
+        return self.count_solutions(limit=1) == 1
+
+    def count_solutions(self, limit=None):
+        """
+        Counting mode: search for up to `limit` solutions (all if None)
+        and return how many were found. The first one is left in self.board.
+        """
+        self._reset_search()
+        self._limit = limit if limit is not None else float("inf")
+
         # Phase 1: rules only
         self.run_rules_only()
 
         if is_solved(self.board):
-            return True
+            self.solutions = 1
+            return 1
 
         # Phase 2: backtracking + rules
-        return self._solve_with_backtracking(self.board, depth=0)
+        self._solve_with_backtracking(self.board, depth=0, explain=Explanations())
 
-    def _apply_rules_until_stable(self, board):
+        # Copy the first solution into the main engine board (self.board).
+        # Not done during the search, since the root node works on self.board.
+        if self._first_solution is not None:
+            for r in range(self.board.size):
+                for c in range(self.board.size):
+                    self.board.set_value(r, c, self._first_solution[r][c])
+        return self.solutions
+
+    def _apply_rules_until_stable(self, board, explain=None, level=0):
         """
         Apply core rules repeatedly on a given board until no more changes.
         Uses the same rules as in KnowledgeBase.rules.
         This is used inside backtracking on branch copies.
+
+        With explain, rules that take an explain argument record the
+        guesses (depths below level) behind each change themselves. Changes
+        made by any other rule are put down to all guesses made so far.
         """
         while True:
             changed = False
             for rule in self.kb.rules:
-                if rule(board, logger=self.logger):
+                if explain is None or level == 0:
+                    # nothing to explain before the first guess
+                    result = rule(board, logger=self.logger)
+                elif _takes_explain(rule):
+                    result = rule(board, logger=self.logger, explain=explain)
+                else:
+                    before = [[(cell.value, set(cell.candidates)) for cell in row] for row in board.cells]
+                    result = rule(board, logger=self.logger)
+                    self._blame_all_guesses(board, before, explain, level)
+                if result:
                     changed = True
             if not changed:
                 break
 
-    def _solve_with_backtracking(self, board, depth=0):
+    def _blame_all_guesses(self, board, before, explain, level):
+        """Record every change since before as depending on all guesses below level."""
+        why = frozenset(range(level))
+        for r in range(board.size):
+            for c in range(board.size):
+                cell = board.cells[r][c]
+                old_value, old_candidates = before[r][c]
+                if cell.value != old_value:
+                    if old_candidates == {cell.value}:
+                        # a naked single: only the removals from this cell matter
+                        explain.assigned[(r, c)] = explain.why_without((r, c), cell.value)
+                    else:
+                        explain.assigned[(r, c)] = why
+                elif cell.value in (None, 0):
+                    for v in old_candidates - cell.candidates:
+                        explain.removed[((r, c), v)] = why
+
+    def _solve_with_backtracking(self, board, depth=0, explain=None):
         """
         Backtracking that:
+        - Makes the domains arc consistent (AC-3) and stops on a wipeout
         - Applies rules on each branch (constraint propagation)
+        - Forward checks every guess before copying the board
         - Uses a deep copy for each guess branch
-        - Copies the solution back to self.board when found
+        - Keeps the first solved board for count_solutions to copy back
+
+        Conflict-directed backjumping: explain records which guesses (by
+        depth) every domain change depends on. A failed branch reports the
+        guesses behind its conflict in self._conflict; if the guess at this
+        depth is not one of them, trying other values here cannot help and
+        the search jumps straight back. The conflicts are also stored as
+        nogoods and pruned in other branches.
+
+        With a transposition table, board states proven unsolvable are
+        stored after propagation (keyed by board.zobrist) and not expanded
+        again when another search reaches them.
+
+        Returns True once self._limit solutions have been found.
         """
-        # First, saturate this board with rules
-        self._apply_rules_until_stable(board)
+        if explain is None:
+            explain = Explanations()
+        self.stats["nodes"] += 1
+        found_before = self.solutions
+
+        # A domain wipeout means this branch is dead, no need to go on
+        if not ac3(board, explain=explain):
+            self._conflict = explain.conflict
+            return False
+
+        # Saturate this board with rules
+        self._apply_rules_until_stable(board, explain, level=depth)
 
         # If solved after rules -> success
         if is_solved(board):
-            return True
+            self.solutions += 1
+            if self.solutions == 1:
+                self._first_solution = board.to_grid()
+            # In counting mode keep going; every guess on the path matters
+            self._conflict = frozenset(range(depth))
+            return self.solutions >= self._limit
+
+        # Same placed values (after propagation) as a state already proven dead
+        key = board.zobrist
+        if self.tt is not None and self.tt.lookup(key):
+            self.stats["tt_hits"] += 1
+            if self.logger is not None:
+                self.logger.add_message(f"Transposition table: state at depth {depth} already known to be unsolvable")
+            self._conflict = frozenset(range(depth))
+            return False
 
         # Choose an empty cell to branch on
         empty = find_empty_cell(board)
         if empty is None:
             # Board full but not solved -> invalid
-            return is_board_valid(board)
+            self._conflict = frozenset(range(depth))
+            return False
 
         row, col = empty
-        candidates = get_candidates(board, row, col)
+        cell = board.cells[row][col]
+        # Branch on the cell's domain, which is never larger than get_candidates
+        candidates = sorted(set(get_candidates(board, row, col)) & cell.candidates)
+
+        # Guesses behind the values that are not tried here
+        conflict = NO_REASON
+        for v in range(1, 10):
+            if v in candidates:
+                continue
+            if v in cell.candidates:
+                # still a candidate, but a peer already holds it
+                conflict |= explain.why_taken(board, (row, col), v)
+            else:
+                conflict |= explain.removed.get(((row, col), v), NO_REASON)
+
         if not candidates:
+            self._conflict = conflict
             return False  # dead end
 
         for value in candidates:
             old_value = board.get_value(row, col)
+            guess = (row, col, value)
+
+            # Learned nogoods: this value plus earlier guesses is known to fail
+            blocked = self._nogood_conflict(guess)
+            if blocked is not None:
+                self.stats["nogood_prunes"] += 1
+                if self.logger is not None:
+                    self.logger.add_message(
+                        f"Nogood: {value} at ({row},{col}) cannot hold together with the guesses at depths {sorted(blocked)}, skipped"
+                    )
+                conflict |= blocked
+                continue
+
+            # Forward checking: skip values that would empty a peer's domain
+            peer = blocking_peer(board, row, col, value)
+            if peer is not None:
+                if self.logger is not None:
+                    self.logger.add_message(
+                        f"Forward check: {value} at ({row},{col}) would leave a peer without candidates, skipped"
+                    )
+                conflict |= explain.why_single(board, peer)
+                continue
 
             if self.logger is not None:
                 self.logger.add_guess(
@@ -127,19 +288,29 @@ class InferenceEngine:
             # Work on a deep copy for this branch
             new_board = copy.deepcopy(board)
             new_board.set_value(row, col, value)
+            new_board.cells[row][col].candidates = set()
+            child = explain.copy()
+            child.assigned[(row, col)] = frozenset((depth,))
+
+            self._guesses.append(guess)
+            self._guess_depth[guess] = depth
 
-            # Apply rules again after the guess
-            self._apply_rules_until_stable(new_board)
+            # Propagate the guess to the peers' domains, then apply rules again
+            if ac3(new_board, changed=[(row, col)], explain=child):
+                self._apply_rules_until_stable(new_board, child, level=depth + 1)
 
-            if is_board_valid(new_board):
-                # Recurse deeper
-                if self._solve_with_backtracking(new_board, depth=depth + 1):
-                    # Copy solution from new_board back into the
-                    # main engine board (self.board)
-                    for r in range(self.board.size):
-                        for c in range(self.board.size):
-                            self.board.set_value(r, c, new_board.get_value(r, c))
-                    return True
+                if is_board_valid(new_board):
+                    # Recurse deeper
+                    if self._solve_with_backtracking(new_board, depth=depth + 1, explain=child):
+                        return True
+                    branch_conflict = self._conflict
+                else:
+                    branch_conflict = frozenset(range(depth + 1))
+            else:
+                branch_conflict = child.conflict
+
+            self._guesses.pop()
+            del self._guess_depth[guess]
 
             if self.logger is not None:
                 self.logger.add_undo(
@@ -151,5 +322,60 @@ class InferenceEngine:
                     reason="Guess led to dead end backtracking",
                 )
 
+            if depth not in branch_conflict:
+                # The guess at this depth played no part in the failure
+                self.stats["backjumps"] += 1
+                if self.logger is not None:
+                    target = max(branch_conflict) if branch_conflict else "root"
+                    self.logger.add_message(
+                        f"Backjump from depth {depth} to depth {target}: "
+                        f"conflict only involves guesses at depths {sorted(branch_conflict)}"
+                    )
+                self._learn_nogood(branch_conflict)
+                if self.solutions == found_before and self.tt is not None:
+                    self.tt.store(key, depth)
+                self._conflict = branch_conflict
+                return False
+
+            conflict |= branch_conflict - {depth}
+
+        if self.solutions == found_before:
+            self._learn_nogood(conflict)
+            if self.tt is not None:
+                self.tt.store(key, depth)
+        self._conflict = conflict
         return False
 
+    # -------------------------------------------------
+    # Nogoods
+    # -------------------------------------------------
+    def _learn_nogood(self, conflict):
+        """Remember the guesses at these depths as a combination that cannot hold."""
+        if not conflict or len(conflict) > MAX_NOGOOD_SIZE:
+            return
+        if self.stats["nogoods"] >= MAX_NOGOODS:
+            return
+        nogood = frozenset(self._guesses[d] for d in conflict)
+        if nogood in self._nogoods.get(self._guesses[max(conflict)], ()):
+            return
+        for guess in nogood:
+            self._nogoods.setdefault(guess, []).append(nogood)
+        self.stats["nogoods"] += 1
+
+    def _nogood_conflict(self, guess):
+        """
+        If guess together with guesses already on the path completes a
+        learned nogood, return the depths of those other guesses.
+        """
+        for nogood in self._nogoods.get(guess, ()):
+            depths = []
+            for other in nogood:
+                if other == guess:
+                    continue
+                d = self._guess_depth.get(other)
+                if d is None:
+                    break
+                depths.append(d)
+            else:
+                return frozenset(depths)
+        return None
@@ -1,5 +1,6 @@
 from Board import Board
 from Cell import Cell
+from CSP import NO_REASON
 import copy
 
 class KnowledgeBase:
@@ -93,8 +94,12 @@ def get_candidates(board, row, col):
 # ----------------------------
 # Rules
 # ----------------------------
+# Every rule takes (board, logger=None, explain=None). With explain (a
+# CSP.Explanations), each value it places and each candidate it removes
+# also records the search guesses the deduction relied on, so IE.py can
+# backjump past guesses that played no part in a conflict.
 
-def apply_single_candidate_rule(board, logger=None):
+def apply_single_candidate_rule(board, logger=None, explain=None):
     """
     If a cell has exactly one candidate in its stored candidate set,
     fill it and clear its candidates, then propagate constraints.
@@ -109,8 +114,9 @@ def apply_single_candidate_rule(board, logger=None):
             if cell.value not in (None, 0):
                 continue
 
-            # Make sure candidates available
-            if not hasattr(cell, "candidates") or not cell.candidates:
+            # Make sure candidates available (an empty set is a dead cell,
+            # not missing candidates)
+            if getattr(cell, "candidates", None) is None:
                 cell.candidates = set(get_candidates(board, r, c))
 
             if len(cell.candidates) == 1:
@@ -118,9 +124,11 @@ def apply_single_candidate_rule(board, logger=None):
                 old_value = cell.value
                 old_candidates = set(cell.candidates)
 
-                cell.value = value
+                if explain is not None:
+                    explain.assigned[(r, c)] = explain.why_without((r, c), value)
+                board.set_value(r, c, value)
                 cell.candidates.clear()
-                propagate_value(board, r, c, value)
+                propagate_value(board, r, c, value, explain)
                 changed = True
 
                 if logger is not None:
@@ -137,7 +145,7 @@ def apply_single_candidate_rule(board, logger=None):
     return changed
 
 
-def apply_hidden_single_rule(board, logger=None):
+def apply_hidden_single_rule(board, logger=None, explain=None):
     """Hidden Single: if a digit can only go in one cell in a group, fill it."""
     changed = False
 
@@ -154,9 +162,11 @@ def apply_hidden_single_rule(board, logger=None):
                 cell = board.cells[row][col]
                 old_value = cell.value
 
-                cell.value = d
+                if explain is not None:
+                    explain.assigned[(row, col)] = _why_only_place(board, explain, cells, (row, col), d)
+                board.set_value(row, col, d)
                 cell.candidates = set()  # no candidates left
-                propagate_value(board, row, col, d)
+                propagate_value(board, row, col, d, explain)
                 changed = True
 
                 if logger is not None:
@@ -193,6 +203,23 @@ def apply_hidden_single_rule(board, logger=None):
 
     return changed
 
+
+def _why_only_place(board, explain, cells, cell, d):
+    """Guesses that leave cell as the only place for d in the group cells."""
+    reason = NO_REASON
+    for other in cells:
+        if other == cell:
+            continue
+        if board.get_value(*other) not in (None, 0):
+            reason |= explain.assigned.get(other, NO_REASON)
+        else:
+            # d is not legal there, so a peer already holds it
+            reason |= explain.why_taken(board, other, d)
+    # The rule goes by the values, cell's stored candidates may have lost d
+    if d not in board.cells[cell[0]][cell[1]].candidates:
+        reason |= explain.removed.get((cell, d), NO_REASON)
+    return reason
+
 # ----------------------------
 # Board validity helpers
 # ----------------------------
@@ -254,27 +281,33 @@ def is_solved(board):
 # Candidate propagation
 # ----------------------------
 
-def propagate_value(board, row, col, value):
+def propagate_value(board, row, col, value, explain=None):
     """
     When (row, col) is set to `value`, remove that value
     from the candidate sets of all other cells in the same
     row, column, and 3×3 box.
+    With explain, the removals depend on the guesses behind (row, col).
     """
     size = board.size
+    why = explain.assigned.get((row, col), NO_REASON) if explain is not None else None
 
     # --- Remove from row ---
     for c in range(size):
         if c != col:
             cell = board.cells[row][c]
-            if hasattr(cell, "candidates") and value in cell.candidates:
+            if cell.candidates and value in cell.candidates:
                 cell.candidates.discard(value)
+                if explain is not None:
+                    explain.removed[((row, c), value)] = why
 
     # --- Remove from column ---
     for r in range(size):
         if r != row:
             cell = board.cells[r][col]
-            if hasattr(cell, "candidates") and value in cell.candidates:
+            if cell.candidates and value in cell.candidates:
                 cell.candidates.discard(value)
+                if explain is not None:
+                    explain.removed[((r, col), value)] = why
 
     # --- Remove from box ---
     box_row_start = (row // 3) * 3
@@ -285,8 +318,10 @@ def propagate_value(board, row, col, value):
             if r == row and c == col:
                 continue
             cell = board.cells[r][c]
-            if hasattr(cell, "candidates") and value in cell.candidates:
+            if cell.candidates and value in cell.candidates:
                 cell.candidates.discard(value)
+                if explain is not None:
+                    explain.removed[((r, c), value)] = why
 
 # ----------------------------
 # Utility for search
@@ -304,12 +339,15 @@ def find_empty_cell(board):
 from itertools import combinations
 
 def _ensure_candidates(board, r, c):
-    """Make sure cell.candidates exists and is up-to-date for an empty cell."""
+    """Make sure cell.candidates has been computed for an empty cell."""
     cell = board.cells[r][c]
     if cell.value not in (None, 0):
         cell.candidates = set()
         return
-    if not hasattr(cell, "candidates") or cell.candidates is None or len(cell.candidates) == 0:
+    # Only compute them if they never were: an empty set means the rules
+    # removed every candidate (a dead board), refilling it from the peers
+    # would undo those eliminations and let the rules cycle forever
+    if getattr(cell, "candidates", None) is None:
         cell.candidates = set(get_candidates(board, r, c))
 
 
@@ -331,7 +369,7 @@ def _all_units(board):
             yield [(r, c) for r in range(br, br + 3) for c in range(bc, bc + 3)]
 
 
-def apply_naked_pairs_rule(board, logger=None):
+def apply_naked_pairs_rule(board, logger=None, explain=None):
     """
     Naked Pairs:
     If two cells in a unit have the exact same two candidates {a,b},
@@ -359,6 +397,12 @@ def apply_naked_pairs_rule(board, logger=None):
             if len(cells_with_pair) != 2:
                 continue
 
+            # the pair cells lost everything but the pair
+            why = NO_REASON
+            if explain is not None:
+                for pair_cell in cells_with_pair:
+                    why |= explain.why_outside(pair_cell, pair_cands)
+
             for (r, c) in unit:
                 if (r, c) in cells_with_pair:
                     continue
@@ -373,6 +417,9 @@ def apply_naked_pairs_rule(board, logger=None):
                 if to_remove:
                     cell.candidates -= to_remove
                     changed = True
+                    if explain is not None:
+                        for v in to_remove:
+                            explain.removed[((r, c), v)] = why
                     if logger is not None:
                         logger.add_elimination(
                             rule_name="naked_pairs",
@@ -385,7 +432,7 @@ def apply_naked_pairs_rule(board, logger=None):
     return changed
 
 
-def apply_naked_triples_rule(board, logger=None):
+def apply_naked_triples_rule(board, logger=None, explain=None):
     """
     Naked Triples:
     If three cells in a unit have candidates whose UNION is exactly 3 digits,
@@ -420,6 +467,11 @@ def apply_naked_triples_rule(board, logger=None):
             if not (set(triple[0][2]) <= union and set(triple[1][2]) <= union and set(triple[2][2]) <= union):
                 continue
 
+            why = NO_REASON
+            if explain is not None:
+                for triple_cell in cells:
+                    why |= explain.why_outside(triple_cell, union)
+
             # eliminate union digits from other cells in unit
             for (r, c) in unit:
                 if (r, c) in cells:
@@ -435,6 +487,9 @@ def apply_naked_triples_rule(board, logger=None):
                 if to_remove:
                     cell.candidates -= to_remove
                     changed = True
+                    if explain is not None:
+                        for v in to_remove:
+                            explain.removed[((r, c), v)] = why
                     if logger is not None:
                         logger.add_elimination(
                             rule_name="naked_triples",
@@ -447,3 +502,262 @@ def apply_naked_triples_rule(board, logger=None):
 
 
     return changed
+
+
+# ----------------------------
+# Per-digit position masks
+# ----------------------------
+
+def _digit_position_masks(board):
+    """
+    Where every digit can still go, from the stored candidates:
+    rows[d][r] has bit c set if d is a candidate of (r, c),
+    cols[d][c] has bit r set for the same cell.
+    """
+    size = board.size
+    rows = {d: [0] * size for d in DIGITS}
+    cols = {d: [0] * size for d in DIGITS}
+    for r in range(size):
+        for c in range(size):
+            if board.get_value(r, c) not in (None, 0):
+                continue
+            _ensure_candidates(board, r, c)
+            for d in board.cells[r][c].candidates:
+                rows[d][r] |= 1 << c
+                cols[d][c] |= 1 << r
+    return rows, cols
+
+
+def _bits(mask):
+    """Indices of the set bits of mask, lowest first."""
+    return [k for k in range(9) if mask >> k & 1]
+
+
+def _why_not_in(board, explain, cells, d):
+    """Guesses that keep d out of every one of cells."""
+    reason = NO_REASON
+    for cell in cells:
+        reason |= explain.why_not(board, cell, d)
+    return reason
+
+
+def _eliminate(board, rule_name, r, c, d, reason, logger=None, explain=None, why=NO_REASON):
+    """
+    Remove d from the candidates of (r, c). Returns True if it was there.
+    why: the guesses the removal relies on, recorded in explain.
+    """
+    cell = board.cells[r][c]
+    if d not in cell.candidates:
+        return False
+    cell.candidates.discard(d)
+    if explain is not None:
+        explain.removed[((r, c), d)] = why
+    if logger is not None:
+        logger.add_elimination(
+            rule_name=rule_name,
+            row=r,
+            col=c,
+            removed={d},
+            reason=reason,
+        )
+    return True
+
+
+def apply_pointing_pairs_rule(board, logger=None, explain=None):
+    """
+    Locked Candidates (pointing):
+    If all places for a digit inside a box lie on one row (or column),
+    the digit can be removed from the rest of that row (or column).
+    """
+    changed = False
+    rows, cols = _digit_position_masks(board)
+
+    for d in DIGITS:
+        for br in range(0, 9, 3):
+            for bc in range(0, 9, 3):
+                band = 0b111 << bc
+                stack = 0b111 << br
+
+                in_rows = [r for r in range(br, br + 3) if rows[d][r] & band]
+                if len(in_rows) == 1:
+                    r = in_rows[0]
+                    # d is out of the box's other two rows
+                    why = NO_REASON
+                    if explain is not None:
+                        why = _why_not_in(board, explain, ((rr, cc) for rr in range(br, br + 3) if rr != r
+                                                           for cc in range(bc, bc + 3)), d)
+                    for c in _bits(rows[d][r] & ~band):
+                        if _eliminate(board, "pointing_pairs", r, c, d,
+                                      f"because {d} in box ({br},{bc}) is locked to row {r}", logger,
+                                      explain, why):
+                            changed = True
+
+                in_cols = [c for c in range(bc, bc + 3) if cols[d][c] & stack]
+                if len(in_cols) == 1:
+                    c = in_cols[0]
+                    why = NO_REASON
+                    if explain is not None:
+                        why = _why_not_in(board, explain, ((rr, cc) for rr in range(br, br + 3)
+                                                           for cc in range(bc, bc + 3) if cc != c), d)
+                    for r in _bits(cols[d][c] & ~stack):
+                        if _eliminate(board, "pointing_pairs", r, c, d,
+                                      f"because {d} in box ({br},{bc}) is locked to column {c}", logger,
+                                      explain, why):
+                            changed = True
+
+    return changed
+
+
+def apply_box_line_reduction_rule(board, logger=None, explain=None):
+    """
+    Locked Candidates (claiming / box-line reduction):
+    If all places for a digit in a row (or column) lie inside one box,
+    the digit can be removed from the rest of that box.
+    """
+    changed = False
+    rows, cols = _digit_position_masks(board)
+
+    for d in DIGITS:
+        for r in range(9):
+            mask = rows[d][r]
+            if not mask:
+                continue
+            for bc in range(0, 9, 3):
+                band = 0b111 << bc
+                if mask & ~band:
+                    continue
+                br = (r // 3) * 3
+                # d is out of the row's cells in the other two boxes
+                why = NO_REASON
+                if explain is not None:
+                    why = _why_not_in(board, explain, ((r, cc) for cc in range(9) if not band >> cc & 1), d)
+                for rr in range(br, br + 3):
+                    if rr == r:
+                        continue
+                    for c in _bits(rows[d][rr] & band):
+                        if _eliminate(board, "box_line_reduction", rr, c, d,
+                                      f"because {d} in row {r} is locked to box ({br},{bc})", logger,
+                                      explain, why):
+                            changed = True
+
+        for c in range(9):
+            mask = cols[d][c]
+            if not mask:
+                continue
+            for br in range(0, 9, 3):
+                stack = 0b111 << br
+                if mask & ~stack:
+                    continue
+                bc = (c // 3) * 3
+                why = NO_REASON
+                if explain is not None:
+                    why = _why_not_in(board, explain, ((rr, c) for rr in range(9) if not stack >> rr & 1), d)
+                for cc in range(bc, bc + 3):
+                    if cc == c:
+                        continue
+                    for r in _bits(cols[d][cc] & stack):
+                        if _eliminate(board, "box_line_reduction", r, cc, d,
+                                      f"because {d} in column {c} is locked to box ({br},{bc})", logger,
+                                      explain, why):
+                            changed = True
+
+    return changed
+
+
+def _apply_fish(board, size, rule_name, logger=None, explain=None):
+    """
+    Basic fish of the given size (2 = X-Wing, 3 = Swordfish):
+    If a digit's places in `size` rows all fall into the same `size` columns,
+    the digit can be removed from those columns in every other row
+    (and the same with rows and columns swapped).
+    """
+    changed = False
+    rows, cols = _digit_position_masks(board)
+
+    for d in DIGITS:
+        for lines, cross, by_rows in ((rows[d], cols[d], True), (cols[d], rows[d], False)):
+            base = [k for k in range(9) if 2 <= bin(lines[k]).count("1") <= size]
+            for combo in combinations(base, size):
+                union = 0
+                for k in combo:
+                    union |= lines[k]
+                if bin(union).count("1") != size:
+                    continue
+
+                kind = "rows" if by_rows else "columns"
+                reason = f"because {d} in {kind} {list(combo)} is confined to {_bits(union)}"
+                # d is out of the base lines everywhere outside the cover lines
+                why = NO_REASON
+                if explain is not None:
+                    outside = ((k, j) if by_rows else (j, k) for k in combo for j in range(9) if not union >> j & 1)
+                    why = _why_not_in(board, explain, outside, d)
+                for j in _bits(union):
+                    for k in _bits(cross[j]):
+                        if k in combo:
+                            continue
+                        r, c = (k, j) if by_rows else (j, k)
+                        if _eliminate(board, rule_name, r, c, d, reason, logger, explain, why):
+                            changed = True
+
+    return changed
+
+
+def apply_x_wing_rule(board, logger=None, explain=None):
+    """X-Wing: fish of size 2, see _apply_fish."""
+    return _apply_fish(board, 2, "x_wing", logger, explain)
+
+
+def apply_swordfish_rule(board, logger=None, explain=None):
+    """Swordfish: fish of size 3, see _apply_fish."""
+    return _apply_fish(board, 3, "swordfish", logger, explain)
+
+
+def apply_pattern_overlay_rule(board, logger=None, explain=None):
+    """
+    Pattern overlay (templates):
+    Every digit ends up on one of the 46656 placement templates in
+    Templates.py (one cell per row, column and box). Templates that use a
+    cell where the digit cannot go are dropped; a candidate that no
+    remaining template covers can be removed. Covers locked candidates
+    and fish.
+    """
+    # Imported here so the template table is only built when the rule is used
+    from Templates import overlay, forbidden_cells
+
+    size = board.size
+    values = []
+    candidates = []
+    for r in range(size):
+        for c in range(size):
+            v = board.get_value(r, c)
+            if v in (None, 0):
+                _ensure_candidates(board, r, c)
+                values.append(0)
+                candidates.append(board.cells[r][c].candidates)
+            else:
+                values.append(v)
+                candidates.append(())
+
+    changed = False
+    for d in DIGITS:
+        forbidden = forbidden_cells(values, candidates, d)
+        covered = overlay(forbidden)
+        if covered:
+            reason = f"because no placement pattern of {d} goes through this cell"
+        else:
+            reason = f"because no placement pattern of {d} fits the board"
+        removable = [i for i in range(size * size)
+                     if values[i] == 0 and d in candidates[i] and not covered >> i & 1]
+        if not removable:
+            continue
+        # the templates were filtered by every cell d cannot go in
+        why = NO_REASON
+        if explain is not None:
+            why = _why_not_in(board, explain, (divmod(i, size) for i in range(size * size)
+                                               if values[i] or d not in candidates[i]), d)
+        for i in removable:
+            if _eliminate(board, "pattern_overlay", i // size, i % size, d, reason, logger,
+                          explain, why):
+                changed = True
+
+    return changed
@@ -12,6 +12,25 @@ def grid_to_string(grid):
     )
 
 
+def read_puzzles(path):
+    """
+    Read a testpuzzles.txt style file.
+    Returns a list of (label, puzzle string); label is None before the first '#' line.
+    """
+    puzzles = []
+    with open(path, "r") as f:
+        current_label = None
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                current_label = line[1:].strip()
+            else:
+                puzzles.append((current_label, line))
+    return puzzles
+
+
 # ----------------------------
 # Manual use
 # ----------------------------
@@ -0,0 +1,259 @@
+# Session.py
+
+"""
+Persistent solving session for interactive front ends.
+
+Instead of rebuilding Board, KnowledgeBase and InferenceEngine after every
+edit, a Session keeps one BitBoard whose candidates are always exactly
+"1-9 minus the digits placed in the peers". Edits update it in place:
+
+    set_value   places the digit and removes it from the 20 peers
+    clear       recomputes the cell and gives the digit back only to the
+                peers that have no other copy of it in sight
+                (BitBoard.clear)
+
+No rule eliminations are stored on the board, so clearing a value never
+leaves stale eliminations behind.
+
+Queries:
+    candidates(row, col)  read straight from the board
+    is_solvable()         the last solution found is kept; it stays valid
+                          while every edit agrees with it (clearing always
+                          does), so a search only runs after an edit that
+                          contradicts it
+    hint()                a naked or hidden single if there is one, otherwise
+                          the solution value of the cell with the fewest
+                          candidates
+"""
+
+from Bitboard import (
+    BitBoard,
+    CELLS,
+    SIZE,
+    UNITS,
+    PEERS,
+    BIT,
+    POPCOUNT,
+    DIGITS_OF,
+    DIGIT_OF,
+    ALL,
+    parse,
+    count_solutions,
+    _pick_cell,
+)
+
+
+class Session:
+    def __init__(self, puzzle):
+        """
+        puzzle: 81-character string ('0' or '.' = empty) or a 9x9 grid of ints.
+        Raises ValueError if the givens contradict each other.
+        """
+        if isinstance(puzzle, str):
+            values = parse(puzzle)
+        else:
+            values = [v or 0 for row in puzzle for v in row]
+        board = BitBoard.from_values(values)
+        if board is None:
+            raise ValueError("The givens contradict each other.")
+        self.board = board
+        self.givens = [bool(v) for v in values]
+        self._solution = None   # 81 ints agreeing with every placed value
+        self._solvable = None   # None = unknown since the last edit
+        self.searches = 0       # how many times the board had to be searched
+        self.is_solvable()      # find a solution up front, not on the first hint
+
+    # -------------------------------------------------
+    # Edits
+    # -------------------------------------------------
+    def set_value(self, row, col, value):
+        """
+        Put value (1-9) at (row, col), replacing what the user put there.
+        Returns False, leaving the board unchanged, if a peer already holds
+        value. Givens cannot be changed (ValueError).
+        """
+        i = self._cell(row, col)
+        if not 1 <= value <= 9:
+            raise ValueError(f"Value must be 1-9, got {value!r}")
+        board = self.board
+        old = board.values[i]
+        if old == value:
+            return True
+        if old:
+            board.clear(i)
+        if not board.cands[i] & BIT[value]:
+            if old:
+                self._place(i, old)
+            return False
+        self._place(i, value)
+
+        if self._solution is None or self._solution[i] != value:
+            self._solution = None
+            self._solvable = None
+        return True
+
+    def _place(self, i, d):
+        board = self.board
+        if not board.place(i, d):
+            # A peer ran out of candidates and place() stopped there, so
+            # finish removing d from the other peers. The edit still stands,
+            # is_solvable() reports the dead end.
+            for p in PEERS[i]:
+                board.eliminate(p, BIT[d])
+        board.trail.clear()  # edits are not undone through the trail
+
+    def clear(self, row, col):
+        """Empty (row, col). Givens cannot be cleared (ValueError)."""
+        i = self._cell(row, col)
+        board = self.board
+        if not board.values[i]:
+            return
+        board.clear(i)
+        board.trail.clear()
+        # Fewer placed values: a known solution still fits, a dead end may not be one any more
+        if self._solution is None:
+            self._solvable = None
+
+    def _cell(self, row, col):
+        if not (0 <= row < SIZE and 0 <= col < SIZE):
+            raise ValueError(f"No cell ({row}, {col})")
+        i = row * SIZE + col
+        if self.givens[i]:
+            raise ValueError(f"({row}, {col}) is a given and cannot be changed")
+        return i
+
+    # -------------------------------------------------
+    # Queries
+    # -------------------------------------------------
+    def value(self, row, col):
+        return self.board.values[row * SIZE + col]
+
+    def candidates(self, row, col):
+        """Digits that no peer holds yet, as a set (empty for a filled cell)."""
+        return set(DIGITS_OF[self.board.cands[row * SIZE + col]])
+
+    def to_string(self):
+        return self.board.to_string()
+
+    def is_solved(self):
+        return self.board.is_complete() and self.is_solvable()
+
+    def is_solvable(self):
+        """Can the current values still be completed to a full solution?"""
+        if self._solvable is None:
+            self._solvable = self._search()
+        return self._solvable
+
+    def _search(self):
+        board = self.board
+        values = board.values
+        cands = board.cands
+        # Cheap check first: an empty cell without candidates
+        for i in range(CELLS):
+            if not values[i] and not cands[i]:
+                return False
+        self.searches += 1
+        count, solution = count_solutions(board, limit=1)
+        board.trail.clear()
+        self._solution = solution
+        return count > 0
+
+    def hint(self):
+        """
+        Next value to fill in, as a dict with row, col, value and technique
+        ("single_candidate", "hidden_single" or "search").
+        None if the board is full or cannot be solved any more.
+        """
+        if not self.is_solvable():
+            return None
+        found = _find_single(self.board)
+        if found is not None:
+            i, d, technique = found
+        else:
+            i = _pick_cell(self.board)
+            if i is None:
+                return None
+            d, technique = self._solution[i], "search"
+        return {"row": i // SIZE, "col": i % SIZE, "value": d, "technique": technique}
+
+
+def _find_single(board):
+    """First naked single, then first hidden single, as (cell, digit, technique) or None."""
+    values = board.values
+    cands = board.cands
+    for i in range(CELLS):
+        if not values[i] and POPCOUNT[cands[i]] == 1:
+            return i, DIGIT_OF[cands[i]], "single_candidate"
+    for unit in UNITS:
+        once = twice = filled = 0
+        for i in unit:
+            v = values[i]
+            if v:
+                filled |= BIT[v]
+            else:
+                m = cands[i]
+                twice |= once & m
+                once |= m
+        singles = once & ~twice & ~filled & ALL
+        if singles:
+            bit = singles & -singles
+            for i in unit:
+                if cands[i] & bit:
+                    return i, DIGIT_OF[bit], "hidden_single"
+    return None
+
+
+# ----------------------------
+# Manual check: replay a solve as user edits and time every call
+# ----------------------------
+if __name__ == "__main__":
+    # python Session.py [puzzle]
+    import random
+    import sys
+    import time
+
+    from Bitboard import solve
+
+    puzzle = sys.argv[1] if len(sys.argv) > 1 else (
+        "980600031007000000600540000000008374000060000000000902032007400040300010000000000"
+    )
+    solution = solve(puzzle)
+    rng = random.Random(1214)
+    session = Session(puzzle)
+
+    timings = {"set_value": [], "clear": [], "is_solvable": [], "hint": [], "candidates": []}
+
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[name].append(time.perf_counter() - start)
+        return result
+
+    empty = [i for i, ch in enumerate(puzzle) if ch in "0."]
+    edits = 0
+    while not session.board.is_complete() and edits < 2000:
+        edits += 1
+        i = rng.choice(empty)
+        r, c = divmod(i, SIZE)
+        timed("candidates", session.candidates, r, c)
+        roll = rng.random()
+        if roll < 0.15 and session.value(r, c):
+            timed("clear", session.clear, r, c)
+        elif roll < 0.3:
+            timed("set_value", session.set_value, r, c, rng.randint(1, 9))  # a mistake, probably
+        else:
+            hint = timed("hint", session.hint)
+            if hint is None:
+                # undo the mistakes: clear every user value that disagrees with the solution
+                for j in empty:
+                    if session.board.values[j] and str(session.board.values[j]) != solution[j]:
+                        timed("clear", session.clear, j // SIZE, j % SIZE)
+                continue
+            timed("set_value", session.set_value, hint["row"], hint["col"], hint["value"])
+        timed("is_solvable", session.is_solvable)
+
+    print(f"solved: {session.to_string() == solution} after {edits} edits, {session.searches} searches")
+    print(f"{'call':12} {'count':>6} {'mean us':>9} {'max us':>9}")
+    for name, times in timings.items():
+        if times:
+            print(f"{name:12} {len(times):6} {sum(times) / len(times) * 1e6:9.1f} {max(times) * 1e6:9.1f}")
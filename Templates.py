@@ -0,0 +1,122 @@
+# Templates.py
+
+"""
+Placement templates for pattern overlay.
+
+A template is one way to place a digit nine times: one cell in every row,
+column and box. There are 46656 of them. As an 81-bit cell mask (bit
+r * 9 + c set for the cell in row r, column c) each would be a ~44-byte
+Python int, about 2 MB for the table. Every template is made of three
+band patterns (one cell in each row of a band, in different boxes), and
+there are only 162 of those, so TEMPLATES stores each template as three
+bytes: the index into PATTERNS of its pattern in the top, middle and
+bottom band (137 KB in all). Built once when this module is imported.
+
+Pattern overlay: a template is still possible for digit d if it avoids
+every cell where d can no longer go. Any candidate d not covered by at
+least one possible template can be removed. This covers the locked
+candidate and fish eliminations (and more) in one rule.
+
+The templates are ordered by the columns used in row 0 and row 1, and
+GROUPS[(c0, c1)] gives the (start, end) slice of the templates that use
+columns c0 and c1 there, so whole groups are skipped when one of those
+two cells is ruled out.
+"""
+
+SIZE = 9
+FULL = (1 << 81) - 1
+BAND_MASK = (1 << 27) - 1
+ROW_MASK = tuple(((1 << SIZE) - 1) << (r * SIZE) for r in range(SIZE))
+
+
+def _band_patterns():
+    """
+    The 162 ways to place a digit in the three rows of one band (one cell
+    per row, each in a different box), in order of their columns, as
+    (key, columns used, 27-bit cell mask) with key = (col in row 0, col in row 1).
+    """
+    patterns = []
+    for c0 in range(SIZE):
+        for c1 in range(SIZE):
+            for c2 in range(SIZE):
+                if len({c0 // 3, c1 // 3, c2 // 3}) == 3:
+                    cols = 1 << c0 | 1 << c1 | 1 << c2
+                    cells = 1 << c0 | 1 << (SIZE + c1) | 1 << (2 * SIZE + c2)
+                    patterns.append(((c0, c1), cols, cells))
+    return patterns
+
+
+def _build():
+    # A template is three band patterns that use disjoint columns; the
+    # bottom band is then fixed to the three columns left over.
+    patterns = _band_patterns()
+    by_cols = {}
+    for k, (_, cols, _) in enumerate(patterns):
+        by_cols.setdefault(cols, []).append(k)
+
+    templates = bytearray()
+    groups = {}
+    all_cols = (1 << SIZE) - 1
+    for k0, (key, cols0, _) in enumerate(patterns):
+        start = len(templates) // 3
+        for k1, (_, cols1, _) in enumerate(patterns):
+            if cols0 & cols1:
+                continue
+            for k2 in by_cols[all_cols ^ cols0 ^ cols1]:
+                templates += bytes((k0, k1, k2))
+        first = groups.get(key, (start, None))[0]
+        groups[key] = (first, len(templates) // 3)
+    return tuple(cells for _, _, cells in patterns), bytes(templates), groups
+
+
+PATTERNS, TEMPLATES, GROUPS = _build()
+
+
+def template(k):
+    """Template k as an 81-bit cell mask."""
+    k0, k1, k2 = TEMPLATES[3 * k:3 * k + 3]
+    return PATTERNS[k0] | PATTERNS[k1] << 27 | PATTERNS[k2] << 54
+
+
+def overlay(forbidden):
+    """
+    Union of all templates that avoid the cells in forbidden (an 81-bit mask).
+    Returns 0 if no template fits.
+    """
+    # Which band patterns avoid the forbidden cells of each band
+    bands = [forbidden >> 27 * b & BAND_MASK for b in range(3)]
+    ok0, ok1, ok2 = ([not cells & band for cells in PATTERNS] for band in bands)
+
+    target = FULL & ~forbidden  # the union can never be more than this
+    allowed0 = ~forbidden & ROW_MASK[0]
+    allowed1 = (~forbidden & ROW_MASK[1]) >> SIZE
+    union = union0 = union1 = union2 = 0
+    for (c0, c1), (start, end) in GROUPS.items():
+        if not (allowed0 >> c0 & 1 and allowed1 >> c1 & 1):
+            continue
+        group = TEMPLATES[3 * start:3 * end]
+        for k0, k1, k2 in zip(group[0::3], group[1::3], group[2::3]):
+            if ok0[k0] and ok1[k1] and ok2[k2]:
+                union0 |= PATTERNS[k0]
+                union1 |= PATTERNS[k1]
+                union2 |= PATTERNS[k2]
+        union = union0 | union1 << 27 | union2 << 54
+        if union == target:
+            break  # every allowed cell is covered, nothing to remove
+    return union
+
+
+def forbidden_cells(values, candidates, d):
+    """
+    Cells where digit d cannot go, as an 81-bit mask.
+    values[i]: placed digit or 0; candidates[i]: set of candidates of an empty cell.
+    A placed d rules out the rest of its row, so templates must go through it.
+    """
+    forbidden = 0
+    for i in range(SIZE * SIZE):
+        v = values[i]
+        if v == d:
+            forbidden |= ROW_MASK[i // SIZE] & ~(1 << i)
+        elif v or d not in candidates[i]:
+            forbidden |= 1 << i
+    return forbidden
@@ -0,0 +1,210 @@
+# Transposition.py
+
+"""
+Bounded transposition table of board states already proven unsolvable.
+
+States are keyed by Board.zobrist (the XOR of the Zobrist keys of all
+placed values), taken after propagation. Whether a set of placed values
+can be completed does not depend on how it was reached, so entries stay
+valid across branches and across puzzles.
+
+Inside one search no two nodes have the same placed values (sibling
+branches differ in the guessed cell), so the table only helps when it is
+shared between searches of the same or related puzzles, e.g. counting
+solutions again or re-checking a puzzle every time a value is filled in. InferenceEngine therefore has no table
+unless one is passed in (tt=...).
+
+Replacement policies when the table is full or two keys share a slot:
+    "always"  the newest entry wins
+    "depth"   keep the entry proven closest to the root (the larger subtree)
+    "lru"     one dict in recency order, the least recently used entry is evicted
+"""
+
+import sys
+from collections import OrderedDict
+
+POLICIES = ("always", "depth", "lru")
+
+
+class TranspositionTable:
+    def __init__(self, capacity=1 << 16, policy="depth"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown replacement policy {policy!r}, use one of {POLICIES}")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.policy = policy
+        if policy == "lru":
+            self.entries = OrderedDict()            # key -> depth
+        else:
+            self.slots = [None] * capacity          # (key, depth) or None
+        self.size = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return self.size
+
+    def lookup(self, key):
+        """True if the state with this hash is known to be unsolvable."""
+        self.probes += 1
+        if self.policy == "lru":
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True
+            return False
+
+        entry = self.slots[key % self.capacity]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return True
+        return False
+
+    def store(self, key, depth):
+        """Record that the state with this hash (found at this search depth) is unsolvable."""
+        if self.policy == "lru":
+            entries = self.entries
+            if key in entries:
+                entries.move_to_end(key)
+                entries[key] = min(depth, entries[key])
+                return
+            if len(entries) >= self.capacity:
+                entries.popitem(last=False)
+                self.evictions += 1
+            else:
+                self.size += 1
+            entries[key] = depth
+            self.stores += 1
+            return
+
+        index = key % self.capacity
+        entry = self.slots[index]
+        if entry is None:
+            self.size += 1
+        elif entry[0] != key:
+            if self.policy == "depth" and entry[1] < depth:
+                return  # keep the shallower (more valuable) entry
+            self.evictions += 1
+        self.slots[index] = (key, depth)
+        self.stores += 1
+
+    def clear(self):
+        self.__init__(self.capacity, self.policy)
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def memory_bytes(self):
+        """Approximate memory held by the table (container plus entries)."""
+        if self.policy == "lru":
+            total = sys.getsizeof(self.entries)
+            for key, depth in self.entries.items():
+                total += sys.getsizeof(key) + sys.getsizeof(depth)
+            return total
+        total = sys.getsizeof(self.slots)
+        for entry in self.slots:
+            if entry is not None:
+                total += sys.getsizeof(entry) + sys.getsizeof(entry[0]) + sys.getsizeof(entry[1])
+        return total
+
+    def report(self):
+        """Statistics as a dict."""
+        return {
+            "policy": self.policy,
+            "capacity": self.capacity,
+            "entries": self.size,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate(),
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+# ----------------------------
+# Manual check: counting solutions with a shared table, then re-solving a
+# hard puzzle as values are filled in
+# ----------------------------
+if __name__ == "__main__":
+    # python Transposition.py [always|depth|lru] [capacity]
+    import random
+    import time
+
+    from Bitboard import BitBoard, count_solutions, solve
+    from UI import build_engine, parse_puzzle
+
+    policy = sys.argv[1] if len(sys.argv) > 1 else "depth"
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 1 << 16
+
+    COUNTED = [
+        # the Easy puzzle with three givens removed
+        "530070000600195000090000060800060003400803001700020000060000280000019005000080079",
+        # the Hard puzzle with one given removed
+        "900600031007000000600540000000008374000060000000000902032007400040300010000000000",
+        # the Hard puzzle with a wrong extra given
+        "980600031007000000600540000006008374000060000000000902032007400040300010000000000",
+        # AI Escargot with a wrong extra given, only refuted by search
+        "100037090030020008009600500005300900010080002600004000300000010040000007007000300",
+    ]
+
+    table = TranspositionTable(capacity, policy)
+    mismatches = 0
+    # The second pass shows the dead states from the first one being reused
+    for puzzle in COUNTED + COUNTED:
+        expected, _ = count_solutions(BitBoard.from_string(puzzle), limit=10 ** 6)
+        _, ie = build_engine(parse_puzzle(puzzle))
+        ie.tt = table
+        start = time.perf_counter()
+        found = ie.count_solutions()
+        elapsed = time.perf_counter() - start
+        if found == expected:
+            status = "ok"
+        else:
+            status = f"MISMATCH, expected {expected}"
+            mismatches += 1
+        print(f"{puzzle}  solutions={found} ({status})  nodes={ie.stats['nodes']}  "
+              f"tt_hits={ie.stats['tt_hits']}  {elapsed:.2f}s")
+
+    print()
+    for name, value in table.report().items():
+        print(f"{name:12} {value}")
+    print()
+
+    PUZZLES = {
+        "AI Escargot": "100007090030020008009600500005300900010080002600004000300000010040000007007000300",
+        "Golden Nugget": "000000039000001005003050800008090006070002000100400000009080050020000600400700000",
+    }
+
+    for name, puzzle in PUZZLES.items():
+        # The puzzle, then with 1, 2, ..., 8 values of its solution filled in
+        solution = solve(puzzle)
+        empty = [i for i, ch in enumerate(puzzle) if ch == "0"]
+        random.Random(1).shuffle(empty)
+        steps = [puzzle]
+        for i in empty[:8]:
+            steps.append(steps[-1][:i] + solution[i] + steps[-1][i + 1:])
+
+        for table in (None, TranspositionTable(capacity, policy)):
+            nodes = hits = 0
+            start = time.perf_counter()
+            for step in steps:
+                _, ie = build_engine(parse_puzzle(step))
+                ie.tt = table
+                ie.count_solutions(limit=2)
+                nodes += ie.stats["nodes"]
+                hits += ie.stats["tt_hits"]
+            elapsed = time.perf_counter() - start
+            line = f"{name:14} {'shared table' if table else 'no table':12}  nodes={nodes}  tt_hits={hits}  {elapsed:.2f}s"
+            if table is not None:
+                report = table.report()
+                line += (f"  probes={report['probes']}  hit_rate={report['hit_rate']:.3f}  "
+                         f"entries={report['entries']}  {report['memory_bytes'] // 1024} KB")
+            print(line)
+
+    if mismatches:
+        print(f"\n{mismatches} solution count(s) differ from Bitboard")
+        sys.exit(1)
@@ -1,9 +1,17 @@
-from Board import Board
-from KB import KnowledgeBase, apply_single_candidate_rule, apply_hidden_single_rule, apply_naked_triples_rule, apply_naked_pairs_rule
-from IE import InferenceEngine
-from logs import Logger
+# UI.py
+# Imports of the solver modules are deferred to the functions that need
+# them, so a --quiet run only loads the small Bitboard module.
+import os
 import sys
 
+PUZZLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "testpuzzles.txt")
+
+USAGE = """usage: python UI.py [--quiet] [puzzle]
+
+  puzzle     81 digits, 0 = empty (default: every puzzle in testpuzzles.txt)
+  --quiet    only print the 81-character solution of each puzzle"""
+
+
 def parse_puzzle(puzzle_str):
     """
     Convert a string of 81 digits (0 = empty) into a 9x9 grid.
@@ -32,79 +40,105 @@ def display_grid(grid):
             print("- " * 11)
 
 
+def build_engine(grid, logger=None):
+    """Create the Board, KnowledgeBase with all rules and InferenceEngine for a grid."""
+    from Board import Board
+    from KB import (
+        KnowledgeBase,
+        apply_single_candidate_rule,
+        apply_hidden_single_rule,
+        apply_pointing_pairs_rule,
+        apply_box_line_reduction_rule,
+        apply_naked_triples_rule,
+        apply_naked_pairs_rule,
+        apply_x_wing_rule,
+        apply_swordfish_rule,
+    )
+    from IE import InferenceEngine
 
-def main():
-    #puzzle_str = "000700800006000031040002000024070000010030080000060290000800070860000500002006000"
-    if len(sys.argv) == 1:
-
-        puzzles = []
-        with open("testpuzzles.txt", "r") as f:
-            current_label = None
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                if line.startswith("#"):
-                    current_label = line[1:].strip()
-                else:
-                    puzzles.append((current_label, line))
-
-        for label, puzzle_str in puzzles:
-
-            grid = parse_puzzle(puzzle_str)
-            board = Board(grid)
-
-            logger = Logger()
-            kb = KnowledgeBase(board)
+    board = Board(grid)
+    kb = KnowledgeBase(board)
 
-            kb.add_rule(apply_single_candidate_rule)
-            kb.add_rule(apply_hidden_single_rule)
-            kb.add_rule(apply_naked_pairs_rule)
-            kb.add_rule(apply_naked_triples_rule)
+    kb.add_rule(apply_single_candidate_rule)
+    kb.add_rule(apply_hidden_single_rule)
+    kb.add_rule(apply_pointing_pairs_rule)
+    kb.add_rule(apply_box_line_reduction_rule)
+    kb.add_rule(apply_naked_pairs_rule)
+    kb.add_rule(apply_naked_triples_rule)
+    kb.add_rule(apply_x_wing_rule)
+    kb.add_rule(apply_swordfish_rule)
 
-            ie = InferenceEngine(board, kb, logger)
+    return board, InferenceEngine(board, kb, logger)
 
-            print("Sudoku Puzzle to be solved:")
-            print("Difficulty: ", label)
-            display_grid(grid)
 
+def solve_verbose(puzzle_str, label=None):
+    """Solve with the rule engine and print the board, result and the log."""
+    from logs import Logger
 
-            solved = ie.solve()
+    grid = parse_puzzle(puzzle_str)
+    logger = Logger()
+    board, ie = build_engine(grid, logger)
 
-            print("\nFinal board:")
-            board.print_board()
-            print("\nSolved?", solved)
+    if label is not None:
+        print("Sudoku Puzzle to be solved:")
+        print("Difficulty: ", label)
+    display_grid(grid)
 
-            print("\n--- LOG ENTRIES ---")
-            logger.print_logs()
-    elif len(sys.argv) == 2:
-            grid = parse_puzzle(sys.argv[1])
-            board = Board(grid)
+    solved = ie.solve()
 
-            logger = Logger()
-            kb = KnowledgeBase(board)
+    print("\nFinal board:")
+    board.print_board()
+    print("\nSolved?", solved)
 
-            kb.add_rule(apply_single_candidate_rule)
-            kb.add_rule(apply_hidden_single_rule)
-            kb.add_rule(apply_naked_pairs_rule)
-            kb.add_rule(apply_naked_triples_rule)
+    print("\n--- LOG ENTRIES ---")
+    logger.print_logs()
+    return solved
 
-            ie = InferenceEngine(board, kb, logger)
 
+def solve_quiet(puzzle_str):
+    """Print only the 81-character solution (nothing is logged)."""
+    from Bitboard import solve
 
-            display_grid(grid)
+    parse_puzzle(puzzle_str)  # same input check as the verbose mode
+    solution = solve(puzzle_str)
+    if solution is None:
+        print("no solution", file=sys.stderr)
+        return False
+    print(solution)
+    return True
 
 
-            solved = ie.solve()
+def main(argv=None):
+    #puzzle_str = "000700800006000031040002000024070000010030080000060290000800070860000500002006000"
+    args = sys.argv[1:] if argv is None else list(argv)
+
+    quiet = False
+    for flag in ("--quiet", "-q"):
+        while flag in args:
+            args.remove(flag)
+            quiet = True
+    if "--help" in args or "-h" in args:
+        print(USAGE)
+        return 0
+    if len(args) > 1:
+        print("to many arguments")
+        return 2
+
+    if args:
+        puzzles = [(None, args[0])]
+    else:
+        from PuzzleFormatter import read_puzzles
+        puzzles = read_puzzles(PUZZLE_FILE)
 
-            print("\nFinal board:")
-            board.print_board()
-            print("\nSolved?", solved)
+    ok = True
+    for label, puzzle_str in puzzles:
+        if quiet:
+            solved = solve_quiet(puzzle_str)
+        else:
+            solved = solve_verbose(puzzle_str, label)
+        ok = ok and solved
+    return 0 if ok else 1
 
-            print("\n--- LOG ENTRIES ---")
-            logger.print_logs()
-    else:
-        return print("to many arguments")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
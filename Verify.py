@@ -0,0 +1,185 @@
+# Verify.py
+
+"""
+Bulk solution verifier using NumPy (needs numpy installed).
+
+Checks many (puzzle, solution) pairs at once instead of building a Board
+and calling is_solved/is_board_valid for each one. Grids are handled as an
+(n, 81) uint8 array of digits (0 = empty), in chunks, and each check is a
+whole-array operation:
+
+    givens      every non-zero puzzle cell equals the solution cell
+    complete    no zero in the solution
+    units       for each of the 27 units, the sum of 2**digit over its cells
+                is 0b1111111110. Nine powers of two only add up to a number
+                with nine set bits if they are all different, so this holds
+                exactly when the unit has every digit once. All 27 sums are
+                one matrix product with a 0/1 cell-to-unit matrix (float32
+                is exact for these small integers).
+
+verify() returns one reason code per pair (see REASONS), the first failing
+check in the order below.
+"""
+
+import numpy as np
+
+OK = 0
+BAD_FORMAT = 1      # not 81 characters of 0-9 / '.', or a value above 9
+GIVEN_CHANGED = 2   # a given of the puzzle differs in the solution
+INCOMPLETE = 3      # the solution has empty cells
+ROW_CONFLICT = 4
+COL_CONFLICT = 5
+BOX_CONFLICT = 6
+
+REASONS = {
+    OK: "ok",
+    BAD_FORMAT: "bad format",
+    GIVEN_CHANGED: "given changed",
+    INCOMPLETE: "incomplete",
+    ROW_CONFLICT: "row conflict",
+    COL_CONFLICT: "column conflict",
+    BOX_CONFLICT: "box conflict",
+}
+
+CHUNK_SIZE = 1 << 14
+FULL_UNIT = 0b1111111110  # bits 1..9
+
+# Character code -> digit, 255 for anything that is not 0-9 or '.'
+_LUT = np.full(256, 255, dtype=np.uint8)
+_LUT[ord("0"):ord("9") + 1] = np.arange(10, dtype=np.uint8)
+_LUT[ord(".")] = 0
+
+# Cell indices of the 27 units: rows, columns, boxes
+UNIT_INDEX = np.array(
+    [[r * 9 + c for c in range(9)] for r in range(9)]
+    + [[r * 9 + c for r in range(9)] for c in range(9)]
+    + [
+        [r * 9 + c for r in range(br, br + 3) for c in range(bc, bc + 3)]
+        for br in range(0, 9, 3)
+        for bc in range(0, 9, 3)
+    ],
+    dtype=np.intp,
+)
+
+# UNIT_MATRIX[cell, unit] = 1 if the cell is in the unit
+UNIT_MATRIX = np.zeros((81, 27), dtype=np.float32)
+for _unit, _cells in enumerate(UNIT_INDEX):
+    UNIT_MATRIX[_cells, _unit] = 1
+
+
+def pack(grids):
+    """
+    Turn a sequence of 81-character strings into an (n, 81) uint8 array.
+    Returns (values, bad): bad[i] is True for strings that are not 81
+    characters of 0-9 / '.' (their row of values is all zeros).
+    An (n, 81) integer array is passed through (values above 9 are bad).
+    """
+    if isinstance(grids, np.ndarray):
+        values = np.asarray(grids, dtype=np.uint8).reshape(-1, 81)
+        bad = (values > 9).any(axis=1)
+        if bad.any():
+            values = values.copy()
+            values[bad] = 0
+        return values, bad
+
+    grids = list(grids)
+    n = len(grids)
+    lengths = np.fromiter(map(len, grids), dtype=np.int64, count=n)
+    wrong_length = lengths != 81
+    if wrong_length.any():
+        grids = ["0" * 81 if length != 81 else g for g, length in zip(grids, lengths)]
+
+    raw = np.frombuffer("".join(grids).encode("latin-1", errors="replace"), dtype=np.uint8)
+    values = _LUT[raw].reshape(n, 81)
+    bad = wrong_length | (values == 255).any(axis=1)
+    values[bad] = 0
+    return values, bad
+
+
+def _verify_chunk(puzzles, solutions, bad):
+    """Reason codes for one chunk of packed grids."""
+    codes = np.zeros(len(solutions), dtype=np.uint8)
+
+    units = np.exp2(solutions, dtype=np.float32) @ UNIT_MATRIX != FULL_UNIT  # (n, 27)
+
+    # Lowest priority first, so the first failing check wins
+    codes[units[:, 18:].any(axis=1)] = BOX_CONFLICT
+    codes[units[:, 9:18].any(axis=1)] = COL_CONFLICT
+    codes[units[:, :9].any(axis=1)] = ROW_CONFLICT
+    codes[solutions.min(axis=1) == 0] = INCOMPLETE
+    # puzzle ^ solution is non-zero where they differ, the minimum with
+    # puzzle keeps that only where the puzzle has a given
+    codes[np.minimum(puzzles ^ solutions, puzzles).any(axis=1)] = GIVEN_CHANGED
+    codes[bad] = BAD_FORMAT
+    return codes
+
+
+def verify(puzzles, solutions, chunk_size=CHUNK_SIZE):
+    """
+    Check solution i against puzzle i for every pair.
+    puzzles, solutions: sequences of 81-character strings or (n, 81) arrays.
+    Returns a uint8 array of reason codes (OK = 0).
+    """
+    p_values, p_bad = pack(puzzles)
+    s_values, s_bad = pack(solutions)
+    if len(p_values) != len(s_values):
+        raise ValueError(f"{len(p_values)} puzzles but {len(s_values)} solutions")
+
+    bad = p_bad | s_bad
+    n = len(s_values)
+    codes = np.empty(n, dtype=np.uint8)
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        codes[start:end] = _verify_chunk(p_values[start:end], s_values[start:end], bad[start:end])
+    return codes
+
+
+def summarize(codes):
+    """Count of each reason code, by name."""
+    counts = np.bincount(codes, minlength=len(REASONS))
+    return {REASONS[code]: int(counts[code]) for code in REASONS}
+
+
+# ----------------------------
+# Benchmark
+# ----------------------------
+if __name__ == "__main__":
+    # python Verify.py [number of grids]
+    import sys
+    import time
+
+    from Bitboard import solve
+    from PuzzleFormatter import read_puzzles
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(1214)
+
+    # Valid grids: relabel the digits of the testpuzzles.txt solutions
+    pairs = [(p, solve(p)) for _, p in read_puzzles("testpuzzles.txt")]
+    base_p, _ = pack([p for p, _ in pairs])
+    base_s, _ = pack([s for _, s in pairs])
+    pick = rng.integers(0, len(pairs), n)
+    relabel = np.zeros((n, 10), dtype=np.uint8)
+    relabel[:, 1:] = rng.permuted(np.tile(np.arange(1, 10, dtype=np.uint8), (n, 1)), axis=1)
+    rows = np.arange(n)[:, None]
+    puzzles = relabel[rows, base_p[pick]]
+    solutions = relabel[rows, base_s[pick]]
+
+    # Break every tenth solution by swapping the first two cells
+    broken = np.arange(0, n, 10)
+    solutions[broken, 0], solutions[broken, 1] = solutions[broken, 1], solutions[broken, 0].copy()
+
+    start = time.perf_counter()
+    codes = verify(puzzles, solutions)
+    elapsed = time.perf_counter() - start
+    print(f"packed arrays: {n} grids in {elapsed:.3f}s ({n / elapsed / 1e6:.2f} M grids/s)")
+
+    strings_p = ["".join(map(str, row)) for row in puzzles[:100_000]]
+    strings_s = ["".join(map(str, row)) for row in solutions[:100_000]]
+    start = time.perf_counter()
+    verify(strings_p, strings_s)
+    elapsed = time.perf_counter() - start
+    print(f"strings      : {len(strings_s)} grids in {elapsed:.3f}s "
+          f"({len(strings_s) / elapsed / 1e6:.2f} M grids/s)")
+
+    print(summarize(codes))
@@ -0,0 +1,8 @@
+# __main__.py
+# Lets the project folder be run directly, e.g. "python ." or
+# "python path/to/id1214-Project --quiet <puzzle>". Same options as UI.py.
+import sys
+
+from UI import main
+
+sys.exit(main())
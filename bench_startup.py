@@ -0,0 +1,103 @@
+# bench_startup.py
+
+"""
+Startup-time benchmark for the command line entry point.
+
+Runs "python -X importtime UI.py --quiet <puzzle>" a number of times and
+reports the wall-clock time of the whole process and the import time
+taken by each module (from the -X importtime lines on stderr), next to an
+empty "python -c pass" for reference.
+
+    python bench_startup.py [--runs N] [--max-ms MS]
+
+With --max-ms the script exits with status 1 if the median wall-clock
+time of UI.py is above MS milliseconds, so it can be used as a check.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PUZZLE = "530070000600195000098000060800060003400803001700020006060000280000419005000080079"
+
+
+def run_once(args):
+    """Run a python process with -X importtime. Returns (wall ms, {module: (self us, cumulative us)})."""
+    # Let .pyc files be written and used, as on a normal install
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=HERE,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{args} failed:\n{proc.stderr}")
+
+    imports = {}
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative |  imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, imports
+
+
+def measure(args, runs):
+    """Median wall time and median per-module import times over several runs."""
+    walls = []
+    per_module = {}
+    for _ in range(runs):
+        wall, imports = run_once(args)
+        walls.append(wall)
+        for name, times in imports.items():
+            per_module.setdefault(name, []).append(times)
+    modules = {
+        name: (statistics.median(t[0] for t in times), statistics.median(t[1] for t in times))
+        for name, times in per_module.items()
+    }
+    return statistics.median(walls), modules
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure UI.py startup time.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, help="fail if the median wall time is above this")
+    args = parser.parse_args(argv)
+
+    # One untimed run so .pyc files exist before measuring
+    run_once(["UI.py", "--quiet", PUZZLE])
+
+    base_wall, base_modules = measure(["-c", "pass"], args.runs)
+    wall, modules = measure(["UI.py", "--quiet", PUZZLE], args.runs)
+
+    own = {name: t for name, t in modules.items() if name not in base_modules}
+    own_total = sum(t[0] for t in own.values()) / 1000
+
+    print(f"python -c pass        : {base_wall:7.1f} ms")
+    print(f"UI.py --quiet <puzzle>: {wall:7.1f} ms  (+{wall - base_wall:.1f} ms)")
+    print(f"imports on top of the interpreter: {len(own)} modules, {own_total:.2f} ms self time")
+    print()
+    print(f"{'module':30} {'self ms':>8} {'cumul ms':>9}")
+    for name, (self_us, cumulative_us) in sorted(own.items(), key=lambda kv: -kv[1][1])[:15]:
+        print(f"{name:30} {self_us / 1000:8.2f} {cumulative_us / 1000:9.2f}")
+
+    if args.max_ms is not None and wall > args.max_ms:
+        print(f"\nFAIL: median startup {wall:.1f} ms is above {args.max_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# countcheck.py
+
+"""
+Soundness check for conflict-directed backjumping in IE.py.
+
+Backjumping skips the values of a guess that played no part in a
+conflict, so it is only correct while every rule reports everything its
+deductions used (the explain= argument of the KB rules). A rule that
+leaves something out makes the search skip values it should have tried,
+which shows up as solutions going missing.
+
+This script builds puzzles with several solutions (generated puzzles with
+some givens removed) and with none (a wrong extra given), counts their
+solutions with InferenceEngine.count_solutions(limit=N) under each rule
+set below and compares the count with Bitboard.count_solutions:
+
+    default    the engine of UI.build_engine
+    basic      single candidate, hidden single, naked pairs, naked triples
+    overlay    basic + pattern overlay
+    fallback   the default rules without an explain parameter, so IE.py
+               blames every guess for what they change
+
+    python countcheck.py [--puzzles N] [--seed S] [--limit N]
+
+Exits with status 1 if any count differs.
+"""
+
+import random
+import sys
+import time
+
+from KB import (
+    apply_single_candidate_rule,
+    apply_hidden_single_rule,
+    apply_naked_pairs_rule,
+    apply_naked_triples_rule,
+    apply_pattern_overlay_rule,
+)
+
+BASIC = [apply_single_candidate_rule, apply_hidden_single_rule, apply_naked_pairs_rule, apply_naked_triples_rule]
+
+
+def without_explain(rule):
+    """The rule behind a wrapper that does not accept explain."""
+    def wrapper(board, logger=None):
+        return rule(board, logger)
+    wrapper.__name__ = rule.__name__
+    return wrapper
+
+
+RULE_SETS = {
+    "default": lambda rules: rules,
+    "basic": lambda rules: list(BASIC),
+    "overlay": lambda rules: BASIC + [apply_pattern_overlay_rule],
+    "fallback": lambda rules: [without_explain(rule) for rule in rules],
+}
+
+
+def make_cases(puzzles, rng):
+    """
+    Three cases per puzzle: givens removed one at a time until there is
+    more than one solution, three givens removed (usually many
+    solutions), and a wrong extra given (no solution).
+    """
+    from Bitboard import solve
+
+    cases = []
+    for puzzle in puzzles:
+        solution = solve(puzzle)
+        givens = [i for i, ch in enumerate(puzzle) if ch != "0"]
+        fewer = list(puzzle)
+        for i in rng.sample(givens, len(givens)):
+            fewer[i] = "0"
+            if expected_count("".join(fewer), 2) > 1:
+                break
+        cases.append("".join(fewer))
+
+        fewer = list(puzzle)
+        for i in rng.sample(givens, 3):
+            fewer[i] = "0"
+        cases.append("".join(fewer))
+
+        i = rng.choice([i for i, ch in enumerate(puzzle) if ch == "0"])
+        wrong = rng.choice([d for d in "123456789" if d != solution[i]])
+        cases.append(puzzle[:i] + wrong + puzzle[i + 1:])
+    return cases
+
+
+def expected_count(puzzle, limit):
+    from Bitboard import BitBoard, count_solutions
+
+    board = BitBoard.from_string(puzzle)
+    if board is None:
+        return 0  # two equal givens in a unit
+    found, _ = count_solutions(board, limit=limit)
+    return found
+
+
+def main(argv=None):
+    import argparse
+
+    from Generator import generate_many
+    from UI import build_engine, parse_puzzle
+
+    parser = argparse.ArgumentParser(description="Compare IE solution counts with the Bitboard solver.")
+    parser.add_argument("--puzzles", type=int, default=6, help="generated puzzles (three cases each)")
+    parser.add_argument("--seed", type=int, default=1214)
+    parser.add_argument("--limit", type=int, default=100, help="stop counting at this many solutions")
+    args = parser.parse_args(argv)
+
+    puzzles = [p for _, p in generate_many(args.puzzles, seed=args.seed)]
+    cases = make_cases(puzzles, random.Random(args.seed))
+    expected = [expected_count(case, args.limit) for case in cases]
+
+    mismatches = 0
+    print(f"{len(cases)} cases, counting up to {args.limit} solutions\n")
+    print(f"{'rules':9} {'nodes':>7} {'backjumps':>10} {'solve s':>8} {'wrong':>6}")
+    for name, make_rules in RULE_SETS.items():
+        nodes = backjumps = wrong = 0
+        start = time.perf_counter()
+        for case, want in zip(cases, expected):
+            _, ie = build_engine(parse_puzzle(case))
+            ie.kb.rules = make_rules(ie.kb.rules)
+            found = ie.count_solutions(limit=args.limit)
+            nodes += ie.stats["nodes"]
+            backjumps += ie.stats["backjumps"]
+            if found != want:
+                wrong += 1
+                print(f"MISMATCH {name}: {case} solutions={found}, expected {want}")
+        print(f"{name:9} {nodes:7} {backjumps:10} {time.perf_counter() - start:8.2f} {wrong:6}")
+        mismatches += wrong
+
+    if mismatches:
+        print(f"\n{mismatches} solution count(s) differ from Bitboard")
+        return 1
+    print("\nOK: every count matches Bitboard")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# memcheck.py
+
+"""
+Memory regression check for the verbose solver, using tracemalloc.
+
+For each fixed puzzle below, every phase is run on a fresh engine and
+measured on its own:
+
+    kb_init          KnowledgeBase(board), i.e. initialize_candidates
+    engine_init      InferenceEngine(...) (no transposition table by default)
+    <rule name>      one call of each rule on the starting board
+    run_rules_only   rules until stable, with a Logger
+    solve            the full solve (rules + search), with a Logger
+
+Per phase it records
+    peak_kb          highest memory allocated during the phase
+    retained_kb      memory allocated during the phase and still held after it
+    retained_blocks  number of those still-held allocations
+
+(tracemalloc's traces are cleared before each phase, so only allocations
+made inside the phase count.)
+
+    python memcheck.py              compare with memcheck_baselines.json
+    python memcheck.py --update     write the current numbers as the new baselines
+
+Exits with status 1 if any number is above its baseline by more than the
+tolerance (default 10%, plus a small absolute slack for tiny phases).
+"""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(HERE, "memcheck_baselines.json")
+
+# Fixed inputs (the puzzles of testpuzzles.txt); changing them needs --update
+PUZZLES = {
+    "Easy": "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+    "Medium": "000260701680070090190004500820100040004602900050003028009300074040050036703018000",
+    "Hard": "980600031007000000600540000000008374000060000000000902032007400040300010000000000",
+}
+
+METRICS = ("peak_kb", "retained_kb", "retained_blocks")
+SLACK = {"peak_kb": 2.0, "retained_kb": 1.0, "retained_blocks": 20}
+
+
+def measure(fn):
+    """Run fn() under tracemalloc. Returns its metrics dict."""
+    gc.collect()
+    tracemalloc.clear_traces()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = len(tracemalloc.take_snapshot().traces)
+    del result
+    return {
+        "peak_kb": round(peak / 1024, 1),
+        "retained_kb": round(current / 1024, 1),
+        "retained_blocks": blocks,
+    }
+
+
+def measure_puzzle(puzzle):
+    """Metrics of every phase for one puzzle, as {phase: metrics}."""
+    from Board import Board
+    from IE import InferenceEngine
+    from KB import KnowledgeBase
+    from UI import build_engine, parse_puzzle
+    from logs import Logger
+
+    grid = parse_puzzle(puzzle)
+    phases = {}
+
+    board = Board(grid)
+    phases["kb_init"] = measure(lambda: KnowledgeBase(board))
+
+    board, ie = build_engine(grid)
+    phases["engine_init"] = measure(lambda: InferenceEngine(board, ie.kb))
+
+    # Each rule once on the starting board; the result is kept (it is the
+    # changed board), so retained memory shows what the rule left behind
+    for rule in ie.kb.rules:
+        board, _ = build_engine(grid)
+        logger = Logger()
+        phases[rule.__name__] = measure(lambda: (rule(board, logger=logger), logger))
+
+    logger = Logger()
+    board, ie = build_engine(grid, logger)
+    phases["run_rules_only"] = measure(lambda: (ie.run_rules_only(), logger))
+
+    logger = Logger()
+    board, ie = build_engine(grid, logger)
+    phases["solve"] = measure(lambda: (ie.solve(), logger))
+    return phases
+
+
+def measure_all():
+    tracemalloc.start()
+    try:
+        return {label: measure_puzzle(puzzle) for label, puzzle in PUZZLES.items()}
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results, baselines, tolerance):
+    """List of (puzzle, phase, metric, value, baseline) over the allowed limit."""
+    failures = []
+    for label, phases in results.items():
+        for phase, metrics in phases.items():
+            base = baselines.get(label, {}).get(phase)
+            if base is None:
+                continue
+            for metric in METRICS:
+                limit = base[metric] * (1 + tolerance) + SLACK[metric]
+                if metrics[metric] > limit:
+                    failures.append((label, phase, metric, metrics[metric], base[metric]))
+    return failures
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check solver memory use against the baselines.")
+    parser.add_argument("--update", action="store_true", help="write the current numbers as baselines")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative increase")
+    args = parser.parse_args(argv)
+
+    results = measure_all()
+
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baselines = json.load(f)
+
+    print(f"{'puzzle':7} {'phase':34} {'peak KB':>9} {'kept KB':>9} {'blocks':>7}   baseline peak/kept/blocks")
+    for label, phases in results.items():
+        for phase, m in phases.items():
+            base = baselines.get(label, {}).get(phase)
+            ref = f"{base['peak_kb']}/{base['retained_kb']}/{base['retained_blocks']}" if base else "-"
+            print(f"{label:7} {phase:34} {m['peak_kb']:9.1f} {m['retained_kb']:9.1f} "
+                  f"{m['retained_blocks']:7}   {ref}")
+
+    if args.update:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nBaselines written to {os.path.basename(BASELINE_FILE)}")
+        return 0
+
+    if not baselines:
+        print("\nNo baselines yet, run with --update")
+        return 1
+
+    failures = compare(results, baselines, args.tolerance)
+    if failures:
+        print()
+        for label, phase, metric, value, base in failures:
+            print(f"FAIL: {label} {phase} {metric} = {value}, baseline {base}")
+        return 1
+    print("\nOK: all phases within the baselines")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())